@@ -0,0 +1,69 @@
+import math
+import numpy as np
+class PopulationAnalytics:
+    def __init__(self, num_neurons, duration, bin_ms=5.0, isi_max_ms=200.0, isi_bins=40):
+        self.num_neurons = num_neurons
+        self.duration = duration
+        self.bin_ms = bin_ms
+        self.num_bins = max(1, math.ceil(duration / bin_ms))
+        self.binned_counts = np.zeros((num_neurons, self.num_bins), dtype=np.uint16)
+        self.spike_counts = np.zeros(num_neurons, dtype=np.int64)
+        self.last_spike = np.full(num_neurons, np.nan)
+        self.isi_count = np.zeros(num_neurons, dtype=np.int64)
+        self.isi_sum = np.zeros(num_neurons)
+        self.isi_sumsq = np.zeros(num_neurons)
+        self.isi_edges = np.linspace(0.0, isi_max_ms, isi_bins + 1)
+        self.isi_hist = np.zeros(isi_bins, dtype=np.int64)
+        self.time = 0.0
+    def update(self, spikes, t_end=None):
+        lengths = np.array([len(train) for train in spikes], dtype=np.int64)
+        if t_end is not None:
+            self.time = max(self.time, min(t_end, self.duration))
+        if not lengths.sum():
+            return
+        times = np.concatenate([np.asarray(train, dtype=np.float64) for train in spikes])
+        neurons = np.repeat(np.arange(len(spikes)), lengths)
+        bins = np.clip((times // self.bin_ms).astype(np.int64), 0, self.num_bins - 1)
+        flat = np.bincount(neurons * self.num_bins + bins, minlength=self.binned_counts.size)
+        self.binned_counts += flat.reshape(self.binned_counts.shape).astype(np.uint16)
+        self.spike_counts += np.bincount(neurons, minlength=self.num_neurons)
+        first = np.flatnonzero(np.diff(neurons, prepend=-1) != 0)
+        last = np.flatnonzero(np.diff(neurons, append=-1) != 0)
+        previous = np.empty_like(times)
+        previous[1:] = times[:-1]
+        previous[first] = self.last_spike[neurons[first]]
+        isi = times - previous
+        valid = ~np.isnan(isi)
+        self.isi_count += np.bincount(neurons[valid], minlength=self.num_neurons)
+        self.isi_sum += np.bincount(neurons[valid], weights=isi[valid], minlength=self.num_neurons)
+        self.isi_sumsq += np.bincount(neurons[valid], weights=isi[valid] ** 2, minlength=self.num_neurons)
+        self.isi_hist += np.histogram(np.minimum(isi[valid], self.isi_edges[-1]), self.isi_edges)[0]
+        self.last_spike[neurons[last]] = times[last]
+        self.time = max(self.time, min(times.max(), self.duration))
+    def observed_bins(self):
+        return max(1, min(self.num_bins, math.ceil(self.time / self.bin_ms)))
+    def population_rate(self):
+        num_bins = self.observed_bins()
+        counts = self.binned_counts[:, :num_bins].sum(axis=0, dtype=np.int64)
+        rate = counts / max(self.num_neurons, 1) / (self.bin_ms / 1000)
+        return (np.arange(num_bins) + 0.5) * self.bin_ms, rate
+    def mean_rates(self):
+        return self.spike_counts / (self.time / 1000) if self.time > 0 else np.zeros(self.num_neurons)
+    def isi_stats(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.isi_sum / self.isi_count
+            std = np.sqrt(np.maximum(self.isi_sumsq / self.isi_count - mean ** 2, 0.0))
+            return {'isi_mean': mean, 'isi_std': std, 'isi_cv': std / mean, 'isi_count': self.isi_count.copy()}
+    def synchrony(self):
+        counts = self.binned_counts[:, :self.observed_bins()].astype(np.float64)
+        if self.num_neurons < 2 or counts.shape[1] < 2:
+            return np.nan
+        individual = counts.var(axis=1).mean()
+        return float(np.sqrt(counts.mean(axis=0).var() / individual)) if individual > 0 else np.nan
+    def summary(self):
+        time, rate = self.population_rate()
+        return {'time': time, 'population_rate': rate, 'mean_rates': self.mean_rates(), 'isi_edges': self.isi_edges, 'isi_hist': self.isi_hist.copy(), 'synchrony': self.synchrony(), **self.isi_stats()}
+def population_analytics(spikes, duration, bin_ms=5.0):
+    analytics = PopulationAnalytics(len(spikes), duration, bin_ms)
+    analytics.update(spikes, duration)
+    return analytics.summary()
@@ -2,36 +2,168 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import json
-import plotly.graph_objects as go
+import io
 from neuron import h
-import random
-from neuron_models import create_neuron_model, create_synapse, create_netstim, create_iclamp, create_vclamp
-from simulation_engine import SimulationEngine, BatchSimulationEngine, analyze_spikes
-from plotly_visualization import plot_neuron_morphology_plotly, plot_batch_results
-import matplotlib.pyplot as plt
-from matplotlib_visualization import plot_neuron_morphology_matplotlib, plot_batch_results_matplotlib, plot_membrane_potential_matplotlib, plot_raster_matplotlib
+import os
+import threading
+import uuid
+from neuron_models import MODEL_SECTIONS
+from mechanisms import initialize_runtime
+from network import Network
+from simulation_engine import SimulationEngine, BatchSimulationEngine, analyze_spikes, StreamingSpikeDetector, StreamAccumulator, SOLVERS, RECORDING_VARIABLES
+from result_cache import ResultCache, config_key, is_deterministic
+from profiling import Profiler, NULL_PROFILER, neuron_object_counts
+from parameter_sweep import SWEEP_PARAMETERS, SAMPLING_METHODS, METRICS, make_design, summarize_design
+from seeding import stream_rng, random123_ids
+from persistence import save_run, save_sweep, load_results
+from job_queue import JobQueue
+from cli import resolve_config, design_base_params
+from analytics import PopulationAnalytics, population_analytics
+from morphology import extract_morphology
+@st.cache_resource
+def neuron_lock():
+    return threading.RLock()
 def clear_session_state():
-    st.session_state.neuron_objects = {'synapses': [],'netcons': [],'netstims': [],'iclamps': [],'vclamps': [],'clamps': []}
-    st.session_state.neuron_models = []
+    with neuron_lock():
+        if st.session_state.get('engine') is not None:
+            st.session_state.engine.teardown()
+        if st.session_state.get('network') is not None:
+            st.session_state.network.teardown()
+    st.session_state.network = None
+    st.session_state.morphology = None
     st.session_state.engine = None
     st.session_state.data = {}
     st.session_state.batch_results = None
     st.session_state.simulation_running = False
     st.session_state.sweep_running = False
+RUN_CACHE_BYTES = 512 * 1024 ** 2
+@st.cache_resource
+def get_result_cache(name, max_entries, max_bytes=None):
+    return ResultCache(max_entries=max_entries, max_bytes=max_bytes)
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(max_workers=os.cpu_count() or 1)
+@st.cache_resource
+def load_neuron_runtime():
+    initialize_runtime()
+def plotting_functions(library):
+    if library == 'Plotly':
+        import plotly_visualization as backend
+        return {'morphology': backend.plot_neuron_morphology_plotly, 'membrane': backend.plot_membrane_potential_plotly, 'raster': backend.plot_raster_plotly, 'batch': backend.plot_batch_results, 'run_comparison': backend.plot_run_comparison_plotly, 'sweep_comparison': backend.plot_sweep_comparison_plotly, 'heatmap': backend.plot_sweep_heatmap_plotly, 'analytics': backend.plot_population_analytics_plotly}
+    import matplotlib_visualization as backend
+    return {'morphology': backend.plot_neuron_morphology_matplotlib, 'membrane': backend.plot_membrane_potential_matplotlib, 'raster': backend.plot_raster_matplotlib, 'batch': backend.plot_batch_results_matplotlib, 'run_comparison': backend.plot_run_comparison_matplotlib, 'sweep_comparison': backend.plot_sweep_comparison_matplotlib, 'heatmap': backend.plot_sweep_heatmap_matplotlib, 'analytics': backend.plot_population_analytics_matplotlib}
+def morphology_figure(library, group_by):
+    figures = st.session_state.morphology_figures
+    if (library, group_by) not in figures:
+        figures[library, group_by] = plotting_functions(library)['morphology'](st.session_state.morphology, group_by)
+    return figures[library, group_by]
+def set_morphology(morphology):
+    st.session_state.morphology = morphology
+    st.session_state.morphology_figures = {}
+def set_network(network):
+    st.session_state.network = network
+    with neuron_lock():
+        set_morphology(extract_morphology(network.models))
+def submit_job(kind, config, label, **session_fields):
+    job_id = get_job_queue().submit(kind, config, owner=st.session_state.session_id, label=label)
+    st.session_state.jobs[job_id] = {'kind': kind, **session_fields}
+    st.session_state.jobs_polling = True
+    st.info(f'Queued background job #{job_id}: {label}')
+def load_job(job_id):
+    job = st.session_state.jobs[job_id]
+    result = get_job_queue().result(job_id)
+    st.session_state.profiler = NULL_PROFILER
+    if job['kind'] == 'run':
+        clear_session_state()
+        data = dict(result)
+        set_morphology(data.pop('morphology'))
+        st.session_state.data = data
+        st.session_state.data_config = job['run_config']
+        if job['run_key'] is not None:
+            get_result_cache('runs', 16, RUN_CACHE_BYTES).put(job['run_key'], (data, st.session_state.morphology))
+    elif job['kind'] == 'sweep':
+        st.session_state.batch_results = result
+        st.session_state.batch_config = job['batch_config']
+    else:
+        st.session_state.design_results = result
+        st.session_state.design_params = job['design_params']
+def job_panel():
+    if not st.session_state.jobs:
+        return
+    queue = get_job_queue()
+    jobs = queue.jobs(owner=st.session_state.session_id)
+    for job_id in set(st.session_state.jobs) - {job['id'] for job in jobs}:
+        st.session_state.jobs.pop(job_id)
+    finished = [job['id'] for job in jobs if job['status'] == 'done']
+    if finished:
+        for job_id in finished:
+            load_job(job_id)
+            queue.forget(job_id)
+            st.session_state.jobs.pop(job_id)
+        st.rerun()
+    active = any(job['status'] in ('queued', 'running') for job in jobs)
+    if not jobs:
+        st.session_state.jobs_polling = False
+        return
+    st.subheader('Background Jobs')
+    for job in jobs:
+        status_col, action_col, dismiss_col = st.columns([4, 1, 1])
+        status_col.progress(job['progress'], text=f"#{job['id']} {job['label']}: {job['status']} ({job['elapsed_s']:.0f} s)")
+        if job['status'] == 'failed':
+            status_col.error(f"{type(queue.error(job['id'])).__name__}: {queue.error(job['id'])}")
+        if job['status'] == 'queued' and action_col.button('Cancel', key=f"cancel_job_{job['id']}"):
+            queue.cancel(job['id'])
+        if job['status'] not in ('queued', 'running') and dismiss_col.button('Dismiss', key=f"dismiss_job_{job['id']}"):
+            queue.forget(job['id'])
+            st.session_state.jobs.pop(job['id'], None)
+            st.rerun()
+    if st.session_state.jobs_polling and not active:
+        st.session_state.jobs_polling = False
+        st.rerun()
+    st.session_state.jobs_polling = active
+load_neuron_runtime()
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}
+if 'jobs_polling' not in st.session_state:
+    st.session_state.jobs_polling = False
 if 'engine' not in st.session_state:
     st.session_state.engine = None
 if 'simulation_running' not in st.session_state:
     st.session_state.simulation_running = False
 if 'data' not in st.session_state:
     st.session_state.data = {}
+if 'stream_result' not in st.session_state:
+    st.session_state.stream_result = None
+if 'stream_chunk_ms' not in st.session_state:
+    st.session_state.stream_chunk_ms = 100
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = NULL_PROFILER
+if 'stream_run_key' not in st.session_state:
+    st.session_state.stream_run_key = None
+if 'stream_analytics' not in st.session_state:
+    st.session_state.stream_analytics = None
+if 'stream_detector' not in st.session_state:
+    st.session_state.stream_detector = None
+if 'data_config' not in st.session_state:
+    st.session_state.data_config = {}
+if 'batch_config' not in st.session_state:
+    st.session_state.batch_config = {}
+if 'run_export' not in st.session_state:
+    st.session_state.run_export = None
 if 'presets' not in st.session_state:
     st.session_state.presets = {}
 if 'results_to_compare' not in st.session_state:
     st.session_state.results_to_compare = []
-if 'neuron_models' not in st.session_state:
-    st.session_state.neuron_models = []
-if 'neuron_objects' not in st.session_state:
-    st.session_state.neuron_objects = {'synapses': [],'netcons': [],'netstims': [],'iclamps': [],'vclamps': [],'clamps': []}
+if 'network' not in st.session_state:
+    st.session_state.network = None
+if 'morphology' not in st.session_state:
+    st.session_state.morphology = None
+if 'design_results' not in st.session_state:
+    st.session_state.design_results = None
+if 'morphology_figures' not in st.session_state:
+    st.session_state.morphology_figures = {}
 if 'selected_stimulus' not in st.session_state:
     st.session_state.selected_stimulus = 'IClamp'
 if 'model_choice' not in st.session_state:
@@ -81,6 +213,10 @@ A **parameter sweep** systematically runs the same simulation multiple times whi
 * **Batch Simulation Results**: A graph that summarizes the results of the parameter sweep. It shows how the network's average firing rate changes as a function of the parameter that was varied.
 """)
 col1, col2 = st.columns([1, 2])
+def export_bytes(save_fn, result, params):
+    buffer = io.BytesIO()
+    save_fn(buffer, result, params)
+    return buffer.getvalue()
 def get_firing_rate(spikes, duration):
     if not spikes or duration == 0:
         return 0
@@ -88,10 +224,13 @@ def get_firing_rate(spikes, duration):
 with col1:
     st.header('Network and Model Parameters')
     st.subheader('Network Configuration')
-    num_neurons = st.number_input('Number of Neurons', 1, 100, 5)
-    connectivity_pattern = st.selectbox('Connectivity Pattern', ['All-to-All', 'Random'])
+    num_neurons = st.number_input('Number of Neurons', 1, 5000, 5)
+    connectivity_pattern = st.selectbox('Connectivity Pattern', ['All-to-All', 'Random', 'Fixed In-Degree'])
     if connectivity_pattern == 'Random':
         connection_prob = st.slider('Connection Probability', 0.0, 1.0, 0.2, 0.05)
+    elif connectivity_pattern == 'Fixed In-Degree':
+        in_degree = st.number_input('Inputs per Neuron', 0, max(num_neurons - 1, 0), min(10, num_neurons - 1))
+    seed = st.number_input('Random Seed', min_value=0, value=None, step=1, placeholder='Unseeded', help='Fixes connectivity sampling and NetStim noise so runs and sweeps are reproducible and can be cached.')
     st.subheader('Neuron Model')
     st.session_state.model_choice = st.selectbox('Select Neuron Model Type (for all neurons)', ['Simple Soma', 'Dendrite (Passive)', 'Multi-Compartment'])
     rm = st.slider('Membrane Resistance (kOhm-cm²)', 100, 50000, 10000)
@@ -103,6 +242,7 @@ with col1:
         st.subheader('Synaptic Parameters (for stimulus)')
         synapse_choice = st.selectbox('Select Synapse Type', ['ExpSyn', 'Exp2Syn'])
         syn_weight = st.slider('Stimulus Synaptic Weight', 0.001, 1.0, 0.05, 0.001)
+        stim_noise = st.slider('Stimulus Noise', 0.0, 1.0, 0.0, 0.05)
     elif st.session_state.selected_stimulus == 'IClamp':
         st.subheader('Current Clamp Parameters')
         stim_delay = st.number_input('Stimulus Delay (ms)', 0, 5000, 100)
@@ -112,62 +252,124 @@ with col1:
         st.subheader('Voltage Clamp Parameters')
         vc_dur = st.number_input('Clamp Duration (ms)', 1, 5000, 100)
         vc_level = st.number_input('Clamp Level (mV)', -100.0, 50.0, -20.0, 0.1)
+    if connectivity_pattern != 'Random':
+        connection_prob = None
+    if connectivity_pattern != 'Fixed In-Degree':
+        in_degree = None
     st.subheader('Simulation Control')
     duration = st.number_input('Simulation Duration (ms)', 100, 5000, 500)
     dt = st.number_input('Timestep (ms)', 0.001, 1.0, 0.025)
+    trace_precision = st.selectbox('Trace Precision', ['float64', 'float32'])
+    solver_labels = {'fixed': 'Fixed Step', 'cvode': 'CVode (global)', 'cvode_local': 'CVode (local step)', 'threads': 'Fixed Step (multithreaded)'}
+    solver = st.selectbox('Solver', SOLVERS, format_func=solver_labels.get)
+    nthread = 1
+    atol = 1e-3
+    rtol = 0.0
+    if solver == 'threads':
+        nthread = st.number_input('Threads', 1, os.cpu_count() or 1, min(4, os.cpu_count() or 1))
+    elif solver in ('cvode', 'cvode_local'):
+        atol = st.number_input('Absolute Tolerance', 1e-6, 1e-1, 1e-3, format='%.0e')
+        rtol = st.number_input('Relative Tolerance', 0.0, 1e-1, 0.0, format='%.0e')
+    run_in_background = st.checkbox('Run as Background Job', value=True, help='Queue runs and sweeps on a shared pool of worker processes, each with its own NEURON instance; results load when the job finishes. Untick to run inside the server process, which is needed for streaming but shares one NEURON instance with every other session.')
+    stream_results = not run_in_background and st.checkbox('Stream Results While Running')
+    chunk_ms = st.number_input('Chunk Size (ms)', 10, 1000, 100) if stream_results else None
+    st.subheader('Recording')
+    record_mode = st.selectbox('Record', ['soma', 'sites', 'spikes'], format_func={'soma': 'Soma voltage', 'sites': 'Soma voltage + selected sites', 'spikes': 'Spikes only'}.get)
+    recording_specs = []
+    if record_mode == 'sites':
+        recording_sections = st.multiselect('Sections', MODEL_SECTIONS[st.session_state.model_choice], default=MODEL_SECTIONS[st.session_state.model_choice][-1:])
+        recording_variables = st.multiselect('Variables', RECORDING_VARIABLES, default=['v'], format_func={'v': 'v (mV)', 'ina': 'ina (mA/cm²)', 'ik': 'ik (mA/cm²)', 'i_syn': 'synaptic i (nA)'}.get)
+        recording_loc = st.slider('Segment Position', 0.0, 1.0, 0.5, 0.1)
+        recording_dt = st.number_input('Recording Interval (ms, 0 = every step)', 0.0, 100.0, 0.0, 0.025, format='%.3f')
+        for variable in recording_variables:
+            if variable == 'i_syn':
+                recording_specs.append({'variable': 'i_syn', 'dt': recording_dt or None})
+            else:
+                recording_specs.extend({'section': section, 'loc': recording_loc, 'variable': variable, 'dt': recording_dt or None} for section in recording_sections)
+    enable_profiling = st.checkbox('Enable Profiling')
+    if st.session_state.selected_stimulus == 'NetStim':
+        stimulus_params = {'synapse_choice': synapse_choice, 'syn_weight': syn_weight, 'stim_noise': stim_noise}
+    elif st.session_state.selected_stimulus == 'IClamp':
+        stimulus_params = {'stim_delay': stim_delay, 'stim_dur': stim_dur, 'stim_amp': stim_amp}
+    else:
+        stimulus_params = {'vc_dur': vc_dur, 'vc_level': vc_level}
+    run_config = {'num_neurons': num_neurons, 'connectivity_pattern': connectivity_pattern, 'connection_prob': connection_prob, 'in_degree': in_degree, 'seed': seed, 'model_choice': st.session_state.model_choice, 'rm': rm, 'cm': cm, 'stimulus': st.session_state.selected_stimulus, 'stimulus_params': stimulus_params, 'target_neuron': target_neuron, 'duration': duration, 'dt': dt, 'trace_precision': trace_precision, 'solver': solver, 'nthread': nthread, 'atol': atol, 'rtol': rtol, 'record_mode': record_mode, 'recordings': recording_specs}
+    run_cache = get_result_cache('runs', 16, RUN_CACHE_BYTES)
+    run_key = config_key(run_config) if is_deterministic(connectivity_pattern, run_config['seed'], st.session_state.selected_stimulus, stimulus_params.get('stim_noise', 0.0)) else None
+    if st.session_state.selected_stimulus == 'NetStim':
+        job_stimulus = {'synapse': synapse_choice, 'weight': syn_weight, 'noise': stim_noise}
+    elif st.session_state.selected_stimulus == 'IClamp':
+        job_stimulus = {'delay': stim_delay, 'dur': stim_dur, 'amp': stim_amp}
+    else:
+        job_stimulus = {'dur': vc_dur, 'level': vc_level}
+    job_config = {
+        'network': {'num_neurons': num_neurons, 'model_choice': st.session_state.model_choice, 'rm': rm, 'cm': cm, 'connectivity_pattern': connectivity_pattern, 'connection_prob': connection_prob, 'in_degree': in_degree, 'weight': 0.02, 'delay': 5},
+        'stimulus': {'type': st.session_state.selected_stimulus, 'target': target_neuron, **job_stimulus},
+        'simulation': {'duration': duration, 'dt': dt, 'solver': solver, 'nthread': nthread, 'atol': atol, 'rtol': rtol, 'trace_precision': trace_precision, 'record_spikes': record_mode == 'spikes', 'record_soma': record_mode != 'spikes', 'recordings': recording_specs, 'seed': seed},
+    }
     if st.button('Start Simulation', key='start_sim_button'):
-        st.session_state.simulation_running = True
-        clear_session_state()
-        h.load_file('stdrun.hoc')
-        for i in range(num_neurons):
-            model_dict = create_neuron_model(st.session_state.model_choice, rm, cm)
-            st.session_state.neuron_models.append(model_dict)
-        inter_neuron_syn_weight = 0.02
-        for i, pre_neuron_dict in enumerate(st.session_state.neuron_models):
-            for j, post_neuron_dict in enumerate(st.session_state.neuron_models):
-                if i == j: continue
-                connect = False
-                if connectivity_pattern == 'All-to-All':
-                    connect = True
-                elif connectivity_pattern == 'Random' and random.random() < connection_prob:
-                    connect = True
-                if connect:
-                    syn = create_synapse(post_neuron_dict['soma'], 'ExpSyn')
-                    st.session_state.neuron_objects['synapses'].append(syn)
-                    source_sec = pre_neuron_dict['soma']
-                    if 'axon' in pre_neuron_dict and pre_neuron_dict['axon'] is not None:
-                        apc = h.APCount(pre_neuron_dict['axon'](1))
-                        netcon = h.NetCon(apc, syn)
-                        st.session_state.neuron_objects['netcons'].append(netcon)
-                        netcon.weight[0] = inter_neuron_syn_weight
-                        netcon.delay = 5
+        st.session_state.profiler = Profiler() if enable_profiling else NULL_PROFILER
+        profiler = st.session_state.profiler
+        cached_run = run_cache.get(run_key) if run_key is not None else None
+        if run_in_background and cached_run is None:
+            submit_job('run', job_config, f'Run ({num_neurons} neurons, {duration} ms)', run_config=run_config, run_key=run_key)
+        elif cached_run is not None:
+            st.session_state.data, morphology = cached_run
+            set_morphology(morphology)
+            st.session_state.data_config = run_config
+            st.success('Simulation complete! (loaded from cache)')
+        else:
+            st.session_state.simulation_running = True
+            clear_session_state()
+            with neuron_lock():
+                with profiler.span('build_network', num_neurons=num_neurons, model_choice=st.session_state.model_choice):
+                    set_network(Network(num_neurons, st.session_state.model_choice, rm, cm))
+                st.session_state.data_config = run_config
+                inter_neuron_syn_weight = 0.02
+                with profiler.span('connect', connectivity_pattern=connectivity_pattern):
+                    st.session_state.network.connect(connectivity_pattern, connection_prob, weight=inter_neuron_syn_weight, delay=5, in_degree=in_degree, rng=stream_rng(seed, 'connectivity') if seed is not None else None)
+                profiler.snapshot_counts('network_built')
+                if st.session_state.selected_stimulus == 'NetStim':
+                    st.session_state.network.set_netstim(target_neuron, synapse_choice, syn_weight, stim_noise, random123_ids(seed) if seed is not None else None)
+                elif st.session_state.selected_stimulus == 'IClamp':
+                    st.session_state.network.set_iclamp(target_neuron, stim_delay, stim_dur, stim_amp)
+                elif st.session_state.selected_stimulus == 'VClamp':
+                    st.session_state.network.set_vclamp(target_neuron, vc_dur, vc_level)
+                try:
+                    st.session_state.engine = SimulationEngine(st.session_state.network.models, duration, dt, record_spikes=record_mode == 'spikes', dtype=np.dtype(trace_precision), solver=solver, nthread=nthread, atol=atol, rtol=rtol, profiler=profiler, record_soma=record_mode != 'spikes', recordings=recording_specs, synapses=st.session_state.network.synapses)
+                except ValueError as e:
+                    st.error(f'Invalid recording: {e}')
+                    st.session_state.simulation_running = False
+                else:
+                    if stream_results:
+                        st.session_state.stream_result = StreamAccumulator(int(round(duration / dt)) + 1)
+                        st.session_state.stream_chunk_ms = chunk_ms
+                        st.session_state.stream_run_key = run_key
+                        st.session_state.stream_analytics = PopulationAnalytics(num_neurons, duration, st.session_state.get('analytics_bin_ms', 5.0))
+                        st.session_state.stream_detector = StreamingSpikeDetector(st.session_state.get('spike_threshold', -20.0))
+                        st.session_state.simulation_running = True
                     else:
-                        netcon = h.NetCon(pre_neuron_dict['soma'](1)._ref_v, syn, sec=pre_neuron_dict['soma'])
-                        st.session_state.neuron_objects['netcons'].append(netcon)
-                        netcon.weight[0] = inter_neuron_syn_weight
-                        netcon.delay = 5
-        target_model_dict = st.session_state.neuron_models[target_neuron]
-        if st.session_state.selected_stimulus == 'NetStim':
-            syn = create_synapse(target_model_dict['soma'], synapse_choice)
-            st.session_state.neuron_objects['synapses'].append(syn)
-            netstim = create_netstim(h)
-            st.session_state.neuron_objects['netstims'].append(netstim)
-            netcon = h.NetCon(netstim, syn)
-            st.session_state.neuron_objects['netcons'].append(netcon)
-            netcon.weight[0] = syn_weight
-        elif st.session_state.selected_stimulus == 'IClamp':
-            iclamp = create_iclamp(target_model_dict['soma'], stim_delay, stim_dur, stim_amp)
-            st.session_state.neuron_objects['iclamps'].append(iclamp)
-        elif st.session_state.selected_stimulus == 'VClamp':
-            vclamp = create_vclamp(target_model_dict['soma'], vc_dur, vc_level)
-            st.session_state.neuron_objects['vclamps'].append(vclamp)
-        st.session_state.engine = SimulationEngine(st.session_state.neuron_models, duration, dt)
-        st.session_state.data = st.session_state.engine.run_simulation()
-        st.session_state.simulation_running = False
-        st.success('Simulation complete!')
+                        st.session_state.data = st.session_state.engine.run_simulation()
+                        profiler.snapshot_counts('simulation_finished')
+                        if run_key is not None:
+                            run_cache.put(run_key, (st.session_state.data, st.session_state.morphology))
+                        st.session_state.simulation_running = False
+                        st.success('Simulation complete!')
+    engine = st.session_state.engine
+    if st.session_state.simulation_running and engine is not None and engine.stream_state in ('idle', 'running', 'paused'):
+        pause_col, resume_col, cancel_col = st.columns(3)
+        if engine.stream_state in ('idle', 'running') and pause_col.button('Pause'):
+            engine.pause_simulation()
+        if engine.stream_state == 'paused' and resume_col.button('Resume'):
+            engine.resume_simulation()
+        if cancel_col.button('Cancel'):
+            engine.cancel_simulation()
+            st.session_state.simulation_running = False
+            st.session_state.stream_result = None
     st.subheader('Parameter Sweep & Batch Analysis')
     sweep_param = st.selectbox('Parameter to Sweep', ['stim_amp', 'syn_weight'])
     trials_per_set = st.number_input('Trials per parameter set', 1, 10, 1)
+    n_workers = st.number_input('Worker processes', 1, os.cpu_count() or 1, 1)
     sweep_values = []
     if sweep_param == 'stim_amp':
         min_val = st.number_input('Min Amplitude (nA)', -10.0, 10.0, 0.1, 0.1)
@@ -180,57 +382,133 @@ with col1:
         step_val = st.number_input('Step', 0.01, 0.5, 0.05, 0.01)
         sweep_values = np.arange(min_val, max_val + step_val, step_val)
     if st.button('Run Parameter Sweep'):
-        st.session_state.sweep_running = True
-        progress_bar = st.progress(0)
-        batch_engine = BatchSimulationEngine()
-        st.session_state.batch_results = batch_engine.run_sweep(sweep_param, sweep_values, trials_per_set, progress_bar, num_neurons, st.session_state.model_choice, rm, cm, duration, dt, connectivity_pattern, connection_prob if connectivity_pattern == 'Random' else None)
-        st.session_state.sweep_running = False
-        st.success('Batch simulation complete!')
+        batch_config = {'sweep_param': sweep_param, 'sweep_values': list(map(float, sweep_values)), 'trials_per_set': trials_per_set, 'num_neurons': num_neurons, 'model_choice': st.session_state.model_choice, 'rm': rm, 'cm': cm, 'duration': duration, 'dt': dt, 'connectivity_pattern': connectivity_pattern, 'connection_prob': connection_prob, 'in_degree': in_degree, 'seed': seed}
+        if run_in_background:
+            submit_job('sweep', {**job_config, 'sweep': {'param': sweep_param, 'values': batch_config['sweep_values'], 'trials': trials_per_set, 'workers': n_workers}}, f'Sweep {sweep_param} ({len(sweep_values)} values)', batch_config=batch_config)
+        else:
+            st.session_state.sweep_running = True
+            progress_bar = st.progress(0)
+            st.session_state.profiler = Profiler() if enable_profiling else NULL_PROFILER
+            batch_engine = BatchSimulationEngine(n_workers, cache=get_result_cache('sweeps', 4096), profiler=st.session_state.profiler)
+            st.session_state.batch_config = batch_config
+            with neuron_lock(), st.session_state.profiler.span('sweep', sweep_param=sweep_param, trials=len(sweep_values) * trials_per_set):
+                st.session_state.batch_results = batch_engine.run_sweep(sweep_param, sweep_values, trials_per_set, progress_bar.progress, num_neurons, st.session_state.model_choice, rm, cm, duration, dt, connectivity_pattern, connection_prob, in_degree, seed)
+            st.session_state.sweep_running = False
+            st.success('Batch simulation complete!')
+    st.subheader('Multi-Parameter Sweep')
+    design_params = st.multiselect('Parameters to Vary', list(SWEEP_PARAMETERS), default=['stim_amp', 'rm'], format_func=lambda name: SWEEP_PARAMETERS[name]['label'])
+    design_method = st.selectbox('Sampling Method', SAMPLING_METHODS, format_func={'grid': 'Cartesian Grid', 'lhs': 'Latin Hypercube', 'random': 'Uniform Random'}.get)
+    design_points = st.number_input('Points per parameter' if design_method == 'grid' else 'Number of samples', 2, 1000, 5 if design_method == 'grid' else 20)
+    design_trials = st.number_input('Trials per sample', 1, 10, 1)
+    design_bounds = {}
+    for name in design_params:
+        spec = SWEEP_PARAMETERS[name]
+        low_col, high_col = st.columns(2)
+        low = low_col.number_input(f"{spec['label']} min", spec['min'], spec['max'], spec['range'][0], key=f'design_{name}_min')
+        high = high_col.number_input(f"{spec['label']} max", spec['min'], spec['max'], spec['range'][1], key=f'design_{name}_max')
+        design_bounds[name] = (low, high)
+    if st.button('Run Multi-Parameter Sweep', disabled=not design_params):
+        design = make_design(design_method, design_bounds, design_points, stream_rng(seed, 'design') if seed is not None else None)
+        base_params = design_base_params(resolve_config(job_config))
+        design_stimuli = {'IClamp': {'stim_amp', 'stim_delay', 'stim_dur'}, 'NetStim': {'syn_weight', 'stim_noise'}}
+        stimuli = [name for name, names in design_stimuli.items() if name == st.session_state.selected_stimulus or names & set(design_params)] or ['IClamp']
+        if run_in_background:
+            submit_job('design', {**job_config, 'design': {'method': design_method, 'parameters': {name: list(bounds) for name, bounds in design_bounds.items()}, 'points': design_points, 'trials': design_trials, 'workers': n_workers, 'stimuli': stimuli}}, f"Multi-parameter sweep ({', '.join(design_params)})", design_params=design_params)
+        else:
+            progress_bar = st.progress(0)
+            st.session_state.profiler = Profiler() if enable_profiling else NULL_PROFILER
+            batch_engine = BatchSimulationEngine(n_workers, cache=get_result_cache('designs', 4096), profiler=st.session_state.profiler)
+            with neuron_lock(), st.session_state.profiler.span('design', parameters=', '.join(design_params), trials=len(design) * design_trials):
+                st.session_state.design_results = pd.DataFrame(batch_engine.run_design(design.to_dict('records'), design_trials, progress_bar.progress, num_neurons, st.session_state.model_choice, duration, dt, connectivity_pattern, base_params, in_degree, stimuli, seed))
+            st.session_state.design_params = design_params
+            st.success(f'Multi-parameter sweep complete! ({len(st.session_state.design_results)} trials)')
 with col2:
     st.header('Simulation Results')
+    st.fragment(job_panel, run_every=1.0 if st.session_state.jobs_polling else None)()
     visualization_library = st.selectbox("Select Plotting Library", ["Plotly", "Matplotlib"])
-    if st.session_state.neuron_models:
+    plot_resolution = st.number_input('Plot Resolution (points per trace)', 200, 20000, 2000, 100)
+    downsampling_method = st.selectbox('Downsampling Method', ['minmax', 'lttb'], format_func={'minmax': 'Min/Max per bucket', 'lttb': 'LTTB'}.get)
+    plots = plotting_functions(visualization_library)
+    if st.session_state.morphology is not None:
         st.subheader('Neuron Morphology')
+        morphology_group_by = st.selectbox('Group Morphology By', ['neuron', 'section_type'], format_func={'neuron': 'Neuron', 'section_type': 'Section Type'}.get)
+        fig_morph = morphology_figure(visualization_library, morphology_group_by)
         if visualization_library == "Plotly":
-            fig_morph = plot_neuron_morphology_plotly(st.session_state.neuron_models)
             st.plotly_chart(fig_morph)
         else:
-            fig_morph = plot_neuron_morphology_matplotlib(st.session_state.neuron_models)
             st.pyplot(fig_morph)
-    if st.session_state.simulation_running:
+    engine = st.session_state.engine
+    if st.session_state.simulation_running and engine is not None and engine.stream_state == 'paused':
+        with neuron_lock():
+            paused_at = h.t
+        st.info(f"Simulation paused at {paused_at:.1f} ms.")
+    elif st.session_state.simulation_running and engine is not None:
         st.info("Simulation in progress...")
+        stream_progress = st.progress(0.0)
+        trace_placeholder = st.empty()
+        analytics_placeholder = st.empty()
+        stream_analytics = st.session_state.stream_analytics
+        with neuron_lock():
+            for chunk in engine.stream_simulation(st.session_state.stream_chunk_ms):
+                st.session_state.stream_result.append(chunk)
+                st.session_state.data = st.session_state.stream_result.data
+                if stream_analytics is not None:
+                    stream_analytics.update(chunk['spikes'] if 'spikes' in chunk else st.session_state.stream_detector.detect(chunk['time'], chunk['v_soma']), h.t)
+                stream_progress.progress(min(h.t / engine.duration, 1.0))
+                if stream_analytics is not None:
+                    if visualization_library == "Plotly":
+                        analytics_placeholder.plotly_chart(plots['analytics'](stream_analytics.summary()), key=f'stream_analytics_{st.session_state.stream_result.num_chunks}')
+                    else:
+                        analytics_placeholder.pyplot(plots['analytics'](stream_analytics.summary()))
+                if st.session_state.data['v_soma'].size and visualization_library == "Plotly":
+                    trace_placeholder.plotly_chart(plots['membrane'](st.session_state.data['time'], st.session_state.data['v_soma'], plot_resolution, downsampling_method), key=f'stream_chart_{st.session_state.stream_result.num_chunks}')
+                elif st.session_state.data['v_soma'].size:
+                    trace_placeholder.pyplot(plots['membrane'](st.session_state.data['time'], st.session_state.data['v_soma'], plot_resolution, downsampling_method))
+        if engine.stream_state == 'finished':
+            if st.session_state.stream_run_key is not None:
+                get_result_cache('runs', 16, RUN_CACHE_BYTES).put(st.session_state.stream_run_key, (st.session_state.data, st.session_state.morphology))
+            st.session_state.stream_result = None
+            st.session_state.stream_analytics = None
+            st.session_state.stream_detector = None
+            st.session_state.simulation_running = False
+            trace_placeholder.empty()
+            analytics_placeholder.empty()
+            st.success('Simulation complete!')
     if st.session_state.data:
-        st.subheader('Membrane Potential')
-        if visualization_library == "Plotly":
-            fig_v = go.Figure()
-            num_neurons_in_data = len(st.session_state.neuron_models)
-            for i in range(num_neurons_in_data):
-                fig_v.add_trace(go.Scatter(x=st.session_state.data['time'], y=st.session_state.data[f'neuron_{i}_v_soma'], mode='lines', name=f'Neuron {i}'))
-            fig_v.update_layout(title='Membrane Potential Traces', xaxis_title='Time (ms)', yaxis_title='Membrane Potential (mV)')
-            st.plotly_chart(fig_v)
-        else:
-            fig_v = plot_membrane_potential_matplotlib(st.session_state.data, len(st.session_state.neuron_models))
-            st.pyplot(fig_v)
+        profiler = st.session_state.profiler
+        if st.session_state.data['v_soma'].size:
+            st.subheader('Membrane Potential')
+            if visualization_library == "Plotly":
+                with profiler.span('plot_membrane', library='plotly'):
+                    fig_v = plots['membrane'](st.session_state.data['time'], st.session_state.data['v_soma'], plot_resolution, downsampling_method)
+                st.plotly_chart(fig_v)
+            else:
+                with profiler.span('plot_membrane', library='matplotlib'):
+                    fig_v = plots['membrane'](st.session_state.data['time'], st.session_state.data['v_soma'], plot_resolution, downsampling_method)
+                st.pyplot(fig_v)
+        recording_units = {'v': 'mV', 'ina': 'mA/cm²', 'ik': 'mA/cm²', 'i_syn': 'nA'}
+        for name, recording in st.session_state.data.get('recordings', {}).items():
+            st.subheader(f'Recording: {name}')
+            fig_rec = plots['membrane'](recording['time'], recording['values'], plot_resolution, downsampling_method, title=name, ylabel=f"{name.rsplit('.', 1)[-1]} ({recording_units.get(name.rsplit('.', 1)[-1], '')})", neurons=recording['neurons'])
+            if visualization_library == "Plotly":
+                st.plotly_chart(fig_rec)
+            else:
+                st.pyplot(fig_rec)
         st.subheader('Spike Raster Plot')
-        spike_threshold = st.slider('Spike Detection Threshold (mV)', -50.0, 0.0, -20.0, 1.0)
+        spike_threshold = st.slider('Spike Detection Threshold (mV)', -50.0, 0.0, -20.0, 1.0, key='spike_threshold')
         if visualization_library == "Plotly":
-            fig_raster = go.Figure()
             all_spike_times = []
             all_neuron_indices = []
             spike_counts = []
-            num_neurons_in_data = len(st.session_state.neuron_models)
-            for i in range(num_neurons_in_data):
-                voltages = st.session_state.data[f'neuron_{i}_v_soma']
-                times = st.session_state.data['time']
-                spikes = analyze_spikes(voltages, times, spike_threshold)
+            with profiler.span('spike_analysis'):
+                spikes_per_neuron = st.session_state.data['spikes'] if 'spikes' in st.session_state.data else analyze_spikes(st.session_state.data['v_soma'], st.session_state.data['time'], spike_threshold)
+            for i, spikes in enumerate(spikes_per_neuron):
                 all_spike_times.extend(spikes)
                 all_neuron_indices.extend([i] * len(spikes))
                 spike_counts.append((i, len(spikes)))
             if all_spike_times:
-                fig_raster.add_trace(go.Scatter(x=all_spike_times, y=all_neuron_indices, mode='markers', marker=dict(symbol='circle', size=4, color='cyan', line=dict(width=1, color='darkblue')), name='Spikes'))
-                fig_raster.update_layout(title='Spike Raster Plot', xaxis_title='Time (ms)', yaxis_title='Neuron Index', yaxis=dict(tickmode='linear', dtick=1), plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
-                fig_raster.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-                fig_raster.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+                with profiler.span('plot_raster', library='plotly'):
+                    fig_raster = plots['raster'](all_spike_times, all_neuron_indices)
                 st.plotly_chart(fig_raster)
             else:
                 st.warning("No spikes detected. Try increasing stimulus strength or adjusting parameters.")
@@ -238,25 +516,114 @@ with col2:
             all_spike_times = []
             all_neuron_indices = []
             spike_counts = []
-            num_neurons_in_data = len(st.session_state.neuron_models)
-            for i in range(num_neurons_in_data):
-                voltages = st.session_state.data[f'neuron_{i}_v_soma']
-                times = st.session_state.data['time']
-                spikes = analyze_spikes(voltages, times, spike_threshold)
+            with profiler.span('spike_analysis'):
+                spikes_per_neuron = st.session_state.data['spikes'] if 'spikes' in st.session_state.data else analyze_spikes(st.session_state.data['v_soma'], st.session_state.data['time'], spike_threshold)
+            for i, spikes in enumerate(spikes_per_neuron):
                 all_spike_times.extend(spikes)
                 all_neuron_indices.extend([i] * len(spikes))
                 spike_counts.append((i, len(spikes)))
-            fig_raster = plot_raster_matplotlib(all_spike_times, all_neuron_indices)
+            with profiler.span('plot_raster', library='matplotlib'):
+                fig_raster = plots['raster'](all_spike_times, all_neuron_indices)
             st.pyplot(fig_raster)
+        st.subheader('Population Analytics')
+        analytics_bin_ms = st.number_input('Rate Bin Width (ms)', 0.5, 500.0, 5.0, 0.5, key='analytics_bin_ms')
+        with profiler.span('population_analytics'):
+            analytics = population_analytics(spikes_per_neuron, st.session_state.data_config['duration'], analytics_bin_ms)
+        rate_col, cv_col, sync_col = st.columns(3)
+        rate_col.metric('Mean Rate (Hz)', f"{analytics['mean_rates'].mean():.2f}" if len(analytics['mean_rates']) else '-')
+        cv_col.metric('Mean ISI CV', f"{np.nanmean(analytics['isi_cv'][analytics['isi_count'] >= 2]):.2f}" if (analytics['isi_count'] >= 2).any() else '-')
+        sync_col.metric('Synchrony χ', '-' if np.isnan(analytics['synchrony']) else f"{analytics['synchrony']:.3f}")
+        if visualization_library == "Plotly":
+            st.plotly_chart(plots['analytics'](analytics))
+        else:
+            st.pyplot(plots['analytics'](analytics))
         st.subheader('Spike Detection Results')
         spike_text = "\n".join([f"Neuron {i}: {count} spikes" for i, count in spike_counts])
         st.text_area("Spike counts per neuron:", value=spike_text, height=150, key="spike_counts", disabled=True)
     if st.session_state.batch_results is not None:
         st.subheader('Batch Simulation Results')
         if visualization_library == "Plotly":
-            fig_batch = plot_batch_results(st.session_state.batch_results)
+            fig_batch = plots['batch'](st.session_state.batch_results)
             st.plotly_chart(fig_batch)
         else:
-            fig_batch = plot_batch_results_matplotlib(st.session_state.batch_results)
+            fig_batch = plots['batch'](st.session_state.batch_results)
             st.pyplot(fig_batch)
+    if st.session_state.design_results is not None:
+        st.subheader('Multi-Parameter Sweep Results')
+        swept = st.session_state.design_params
+        metric_labels = {'firing_rate': 'Firing Rate (Hz)', 'isi_cv': 'ISI CV', 'first_spike_latency': 'First-Spike Latency (ms)', 'spike_count': 'Spike Count'}
+        heatmap_metric = st.selectbox('Metric', METRICS, format_func=metric_labels.get)
+        if len(swept) >= 2:
+            x_col, y_col = st.columns(2)
+            heatmap_x = x_col.selectbox('X Axis', swept, index=0)
+            heatmap_y = y_col.selectbox('Y Axis', swept, index=1)
+            if heatmap_x != heatmap_y:
+                fig_heatmap = plots['heatmap'](st.session_state.design_results, heatmap_x, heatmap_y, heatmap_metric)
+                if visualization_library == "Plotly":
+                    st.plotly_chart(fig_heatmap)
+                else:
+                    st.pyplot(fig_heatmap)
+        elif swept:
+            st.line_chart(st.session_state.design_results.groupby(swept[0])[heatmap_metric].mean())
+        st.dataframe(summarize_design(st.session_state.design_results, swept))
+        st.download_button('Download Trials (CSV)', st.session_state.design_results.to_csv(index=False), file_name='parameter_sweep.csv', mime='text/csv')
+    with st.expander('NEURON Object Diagnostics'):
+        if st.button('Count Live NEURON Objects'):
+            with neuron_lock():
+                live_counts = neuron_object_counts()
+                owned_counts = st.session_state.network.object_counts() if st.session_state.network is not None else {'sections': 0, 'point_processes': 0, 'NetCon': 0}
+            st.dataframe(pd.DataFrame({'live': live_counts, 'owned by current network': owned_counts}))
+            if live_counts['sections'] > owned_counts['sections']:
+                st.warning(f"{live_counts['sections'] - owned_counts['sections']} sections are alive but not owned by the current network.")
+    if isinstance(st.session_state.profiler, Profiler) and st.session_state.profiler.spans:
+        with st.expander('Profiling Breakdown'):
+            st.dataframe(pd.DataFrame(st.session_state.profiler.summary()))
+            if st.session_state.profiler.counts:
+                st.dataframe(pd.DataFrame(st.session_state.profiler.counts).drop(columns='time_s'))
+            st.download_button('Download Chrome Trace', json.dumps(st.session_state.profiler.to_chrome_trace()), file_name='profile_trace.json', mime='application/json')
 
+    st.subheader('Export & Compare Results')
+    if st.session_state.data and not st.session_state.simulation_running:
+        export_ready = st.session_state.run_export is not None and st.session_state.run_export[0] is st.session_state.data
+        if not export_ready and st.button('Prepare Run Export'):
+            st.session_state.run_export = (st.session_state.data, export_bytes(save_run, st.session_state.data, st.session_state.data_config))
+            export_ready = True
+        if export_ready:
+            st.download_button('Download Run (.npz)', st.session_state.run_export[1], file_name='neuron_run.npz', mime='application/octet-stream')
+        if st.button('Add Run to Comparison'):
+            run_bytes = st.session_state.run_export[1] if export_ready else export_bytes(save_run, st.session_state.data, st.session_state.data_config)
+            st.session_state.results_to_compare.append({'name': f'Run {len(st.session_state.results_to_compare) + 1}', 'result': load_results(io.BytesIO(run_bytes))})
+    if st.session_state.batch_results is not None:
+        st.download_button('Download Sweep (.npz)', export_bytes(save_sweep, st.session_state.batch_results, st.session_state.batch_config), file_name='neuron_sweep.npz', mime='application/octet-stream')
+        if st.button('Add Sweep to Comparison'):
+            sweep_bytes = export_bytes(save_sweep, st.session_state.batch_results, st.session_state.batch_config)
+            st.session_state.results_to_compare.append({'name': f'Sweep {len(st.session_state.results_to_compare) + 1}', 'result': load_results(io.BytesIO(sweep_bytes))})
+    uploaded_files = st.file_uploader('Load Saved Results (.npz)', type=['npz'], accept_multiple_files=True)
+    loaded_names = {entry['name'] for entry in st.session_state.results_to_compare}
+    for uploaded_file in uploaded_files or []:
+        if uploaded_file.name not in loaded_names:
+            stored = load_results(uploaded_file)
+            st.session_state.results_to_compare.append({'name': uploaded_file.name, 'result': stored})
+            st.session_state.presets[uploaded_file.name] = stored.params
+    if st.session_state.results_to_compare:
+        runs_to_compare = [(entry['name'], entry['result']) for entry in st.session_state.results_to_compare if entry['result'].kind == 'run' and entry['result'].shape('v_soma')[0]]
+        if any(entry['result'].kind == 'run' and not entry['result'].shape('v_soma')[0] for entry in st.session_state.results_to_compare):
+            st.info('Runs recorded without soma voltage traces are left out of the voltage comparison.')
+        sweeps_to_compare = [(entry['name'], entry['result']) for entry in st.session_state.results_to_compare if entry['result'].kind == 'sweep']
+        if runs_to_compare:
+            compare_neuron = st.number_input('Neuron Index to Compare', 0, max(result.shape('v_soma')[0] for _, result in runs_to_compare) - 1, 0)
+            if visualization_library == "Plotly":
+                st.plotly_chart(plots['run_comparison'](runs_to_compare, compare_neuron, plot_resolution, downsampling_method))
+            else:
+                st.pyplot(plots['run_comparison'](runs_to_compare, compare_neuron, plot_resolution, downsampling_method))
+        if sweeps_to_compare:
+            if visualization_library == "Plotly":
+                st.plotly_chart(plots['sweep_comparison'](sweeps_to_compare))
+            else:
+                st.pyplot(plots['sweep_comparison'](sweeps_to_compare))
+        with st.expander('Parameters of Compared Results'):
+            for entry in st.session_state.results_to_compare:
+                st.markdown(f"**{entry['name']}**")
+                st.json(entry['result'].params)
+        if st.button('Clear Comparison'):
+            st.session_state.results_to_compare = []
@@ -0,0 +1,88 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from network import Network
+from simulation_engine import SimulationEngine, BatchSimulationEngine, analyze_spikes, SOLVERS
+from profiling import peak_rss_mb, current_rss_mb
+from mechanisms import initialize_runtime
+MODELS = ['Simple Soma', 'Dendrite (Passive)', 'Multi-Compartment']
+CONNECTIVITY = ['All-to-All', 'Random']
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+def timed(stages, name, fn, *args, **kwargs):
+    start_rss = current_rss_mb()
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    stages[name] = {'wall_time_s': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb(), 'rss_delta_mb': current_rss_mb() - start_rss}
+    return result
+def build_network(model_choice, num_neurons, connectivity_pattern, connection_prob):
+    network = Network(num_neurons, model_choice, 10000, 1.0)
+    network.connect(connectivity_pattern, connection_prob, delay=5, rng=0)
+    network.set_iclamp(0, 100, 100, 2.0)
+    return network
+def build_figures(data, spikes_per_neuron):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib_visualization import plot_membrane_potential_matplotlib, plot_raster_matplotlib
+    from plotly_visualization import plot_membrane_potential_plotly, plot_raster_plotly
+    all_spike_times = np.concatenate(spikes_per_neuron) if spikes_per_neuron else np.empty(0)
+    all_neuron_indices = np.repeat(np.arange(len(spikes_per_neuron)), [len(spikes) for spikes in spikes_per_neuron])
+    plot_membrane_potential_plotly(data['time'], data['v_soma']).to_json()
+    plot_raster_plotly(all_spike_times, all_neuron_indices).to_json()
+    plt.close(plot_membrane_potential_matplotlib(data['time'], data['v_soma']))
+    if len(all_spike_times):
+        plt.close(plot_raster_matplotlib(all_spike_times, all_neuron_indices))
+def benchmark_case(model_choice, num_neurons, connectivity_pattern, connection_prob, duration, dt, solver, nthread, plots, sweep_values):
+    stages = {}
+    network = timed(stages, 'build', build_network, model_choice, num_neurons, connectivity_pattern, connection_prob)
+    engine = SimulationEngine(network.models, duration, dt, solver=solver, nthread=nthread)
+    data = timed(stages, 'simulate', engine.run_simulation)
+    spikes_per_neuron = timed(stages, 'analyze', analyze_spikes, data['v_soma'], data['time'], -20)
+    if plots:
+        timed(stages, 'plot', build_figures, data, spikes_per_neuron)
+    num_connections = len(network.netcons)
+    engine.teardown()
+    network.teardown()
+    if sweep_values:
+        timed(stages, 'sweep', BatchSimulationEngine().run_sweep, 'stim_amp', np.linspace(0.5, 2.0, sweep_values), 1, None, num_neurons, model_choice, 10000, 1.0, duration, dt, connectivity_pattern, connection_prob)
+    return {'model': model_choice, 'num_neurons': num_neurons, 'connectivity': connectivity_pattern, 'connection_prob': connection_prob, 'duration': duration, 'dt': dt, 'solver': solver, 'nthread': nthread if solver == 'threads' else 1, 'connections': num_connections, 'samples': int(data['v_soma'].size), 'samples_per_s': data['v_soma'].size / stages['simulate']['wall_time_s'], 'spikes': int(sum(len(spikes) for spikes in spikes_per_neuron)), 'stages': stages}
+def run_case_isolated(*case):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'), initializer=initialize_runtime) as executor:
+        return executor.submit(benchmark_case, *case).result()
+def main():
+    parser = argparse.ArgumentParser(description='Headless benchmark of the model build, simulate, analyze, plot and sweep stages.')
+    parser.add_argument('--models', nargs='+', default=MODELS, choices=MODELS)
+    parser.add_argument('--neurons', nargs='+', type=int, default=[1, 10, 100])
+    parser.add_argument('--connectivity', nargs='+', default=CONNECTIVITY, choices=CONNECTIVITY)
+    parser.add_argument('--connection-prob', type=float, default=0.1)
+    parser.add_argument('--durations', nargs='+', type=float, default=[1000])
+    parser.add_argument('--dts', nargs='+', type=float, default=[0.025])
+    parser.add_argument('--solvers', nargs='+', default=['fixed'], choices=SOLVERS)
+    parser.add_argument('--nthread', type=int, default=4)
+    parser.add_argument('--no-plots', action='store_true', help='skip the figure-building stage')
+    parser.add_argument('--sweep-values', type=int, default=0, help='also time run_sweep over this many stimulus amplitudes')
+    parser.add_argument('--output', help='append JSON lines to this file instead of stdout')
+    args = parser.parse_args()
+    commit = git_commit()
+    out = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for model_choice, num_neurons, connectivity_pattern, duration, dt, solver in itertools.product(args.models, args.neurons, args.connectivity, args.durations, args.dts, args.solvers):
+            result = run_case_isolated(model_choice, num_neurons, connectivity_pattern, args.connection_prob if connectivity_pattern == 'Random' else None, duration, dt, solver, args.nthread, not args.no_plots, args.sweep_values)
+            result['commit'] = commit
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+from network import Network
+from simulation_engine import SimulationEngine, BatchSimulationEngine
+from persistence import save_run, save_sweep
+from profiling import Profiler, NULL_PROFILER
+from parameter_sweep import make_design, default_params
+from seeding import stream_rng, random123_ids
+from mechanisms import initialize_runtime
+from morphology import extract_morphology
+DEFAULT_CONFIG = {
+    'network': {'num_neurons': 5, 'model_choice': 'Simple Soma', 'rm': 10000, 'cm': 1.0, 'connectivity_pattern': 'All-to-All', 'connection_prob': None, 'in_degree': None, 'weight': 0.02, 'delay': 5},
+    'stimulus': {'type': 'IClamp', 'target': 0, 'delay': 100, 'dur': 100, 'amp': 2.0, 'synapse': 'ExpSyn', 'weight': 0.05, 'noise': 0.0, 'level': -20.0},
+    'simulation': {'duration': 500, 'dt': 0.025, 'solver': 'fixed', 'nthread': 1, 'atol': 1e-3, 'rtol': 0.0, 'trace_precision': 'float64', 'record_spikes': False, 'record_soma': True, 'recordings': [], 'seed': None},
+    'sweep': {'param': 'stim_amp', 'values': {'start': 0.1, 'stop': 2.0, 'step': 0.5}, 'trials': 1, 'workers': 1},
+    'design': {'method': 'grid', 'parameters': {'stim_amp': [0.1, 2.0], 'rm': [5000, 20000]}, 'points': 5, 'trials': 1, 'workers': 1, 'stimuli': ['IClamp']},
+}
+def load_config(path):
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError('PyYAML is required to read YAML configs; use JSON or pip install pyyaml') from e
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+    return resolve_config(config or {})
+def resolve_config(config):
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown config sections: {', '.join(sorted(unknown))}")
+    resolved = {section: {**defaults, **(config.get(section) or {})} for section, defaults in DEFAULT_CONFIG.items()}
+    net = resolved['network']
+    if net['connectivity_pattern'] == 'Random' and net['connection_prob'] is None:
+        raise ValueError("network.connection_prob is required for connectivity_pattern 'Random'")
+    if net['connectivity_pattern'] == 'Fixed In-Degree' and net['in_degree'] is None:
+        raise ValueError("network.in_degree is required for connectivity_pattern 'Fixed In-Degree'")
+    return resolved
+def expand_sweep_values(values):
+    if isinstance(values, dict):
+        return np.arange(values['start'], values['stop'] + values['step'], values['step'])
+    return np.asarray(values, dtype=np.float64)
+def apply_stimulus(network, stimulus, seed=None):
+    if stimulus['type'] == 'IClamp':
+        network.set_iclamp(stimulus['target'], stimulus['delay'], stimulus['dur'], stimulus['amp'])
+    elif stimulus['type'] == 'NetStim':
+        network.set_netstim(stimulus['target'], stimulus['synapse'], stimulus['weight'], stimulus['noise'], random123_ids(seed) if seed is not None else None)
+    elif stimulus['type'] == 'VClamp':
+        network.set_vclamp(stimulus['target'], stimulus['dur'], stimulus['level'])
+    else:
+        raise ValueError(f"Unknown stimulus type: {stimulus['type']}")
+def run_from_config(config, profiler=None, morphology=False):
+    profiler = profiler or NULL_PROFILER
+    net, stimulus, sim = config['network'], config['stimulus'], config['simulation']
+    initialize_runtime()
+    with profiler.span('build_network', num_neurons=net['num_neurons']):
+        network = Network(net['num_neurons'], net['model_choice'], net['rm'], net['cm'])
+    with profiler.span('connect', connectivity_pattern=net['connectivity_pattern']):
+        network.connect(net['connectivity_pattern'], net['connection_prob'], weight=net['weight'], delay=net['delay'], in_degree=net['in_degree'], rng=stream_rng(sim['seed'], 'connectivity') if sim['seed'] is not None else None)
+    apply_stimulus(network, stimulus, sim['seed'])
+    engine = SimulationEngine(network.models, sim['duration'], sim['dt'], record_spikes=sim['record_spikes'], dtype=np.dtype(sim['trace_precision']), solver=sim['solver'], nthread=sim['nthread'], atol=sim['atol'], rtol=sim['rtol'], profiler=profiler, record_soma=sim['record_soma'], recordings=sim['recordings'], synapses=network.synapses)
+    try:
+        data = engine.run_simulation()
+        if morphology:
+            data['morphology'] = extract_morphology(network.models)
+        return data
+    finally:
+        engine.teardown()
+        network.teardown()
+def sweep_from_config(config, progress_callback=None, profiler=None):
+    net, sim, sweep = config['network'], config['simulation'], config['sweep']
+    initialize_runtime()
+    batch_engine = BatchSimulationEngine(sweep['workers'], profiler=profiler)
+    return batch_engine.run_sweep(sweep['param'], expand_sweep_values(sweep['values']), sweep['trials'], progress_callback, net['num_neurons'], net['model_choice'], net['rm'], net['cm'], sim['duration'], sim['dt'], net['connectivity_pattern'], net['connection_prob'], net['in_degree'], sim['seed'])
+def design_base_params(config):
+    net, stimulus = config['network'], config['stimulus']
+    base_params = {**default_params(), 'rm': net['rm'], 'cm': net['cm'], 'stim_amp': stimulus['amp'], 'stim_delay': stimulus['delay'], 'stim_dur': stimulus['dur'], 'syn_weight': stimulus['weight'], 'stim_noise': stimulus['noise'], 'netcon_delay': net['delay']}
+    if net['connection_prob'] is not None:
+        base_params['connection_prob'] = net['connection_prob']
+    return base_params
+def design_from_config(config, progress_callback=None, profiler=None):
+    net, sim, design = config['network'], config['simulation'], config['design']
+    initialize_runtime()
+    samples = make_design(design['method'], {name: tuple(bounds) for name, bounds in design['parameters'].items()}, design['points'], stream_rng(sim['seed'], 'design') if sim['seed'] is not None else None)
+    base_params = design_base_params(config)
+    batch_engine = BatchSimulationEngine(design['workers'], profiler=profiler)
+    return pd.DataFrame(batch_engine.run_design(samples.to_dict('records'), design['trials'], progress_callback, net['num_neurons'], net['model_choice'], sim['duration'], sim['dt'], net['connectivity_pattern'], base_params, net['in_degree'], tuple(design['stimuli']), sim['seed']))
+def print_progress(fraction):
+    sys.stderr.write(f'\rprogress: {fraction:6.1%}')
+    if fraction >= 1:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a single simulation or a parameter sweep from a JSON/YAML config, without the Streamlit UI.')
+    parser.add_argument('command', choices=['run', 'sweep', 'design'])
+    parser.add_argument('config', help='JSON or YAML file with network, stimulus, simulation, sweep and design sections')
+    parser.add_argument('-o', '--output', required=True, help='.npz file, or a directory with --no-compress; a CSV file for design')
+    parser.add_argument('--no-compress', action='store_true', help='write a directory of .npy files that load memory-mapped')
+    parser.add_argument('--quiet', action='store_true', help='do not report sweep progress on stderr')
+    parser.add_argument('--profile', help='write a Chrome trace of the run stages to this file')
+    args = parser.parse_args(argv)
+    config = load_config(args.config)
+    profiler = Profiler() if args.profile else NULL_PROFILER
+    if args.command == 'run':
+        save_run(args.output, run_from_config(config, profiler), config, compress=not args.no_compress)
+    elif args.command == 'design':
+        design_from_config(config, None if args.quiet else print_progress, profiler).to_csv(args.output, index=False)
+    else:
+        config['sweep']['values'] = expand_sweep_values(config['sweep']['values']).tolist()
+        results = sweep_from_config(config, None if args.quiet else print_progress, profiler)
+        save_sweep(args.output, results, config, compress=not args.no_compress)
+    if args.profile:
+        profiler.export_chrome_trace(args.profile)
+if __name__ == '__main__':
+    main()
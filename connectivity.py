@@ -0,0 +1,44 @@
+import numpy as np
+def _pair_index_to_edges(flat_index, num_neurons):
+    pre = flat_index // (num_neurons - 1)
+    post = flat_index % (num_neurons - 1)
+    post += post >= pre
+    return pre, post
+def all_to_all_edges(num_neurons):
+    if num_neurons < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return _pair_index_to_edges(np.arange(num_neurons * (num_neurons - 1), dtype=np.int64), num_neurons)
+def bernoulli_edges(num_neurons, connection_prob, rng):
+    if num_neurons < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    num_pairs = num_neurons * (num_neurons - 1)
+    num_edges = rng.binomial(num_pairs, connection_prob)
+    flat_index = np.sort(rng.choice(num_pairs, size=num_edges, replace=False)).astype(np.int64)
+    return _pair_index_to_edges(flat_index, num_neurons)
+def fixed_in_degree_edges(num_neurons, in_degree, rng):
+    in_degree = min(int(in_degree), num_neurons - 1)
+    if in_degree <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pre = np.empty(num_neurons * in_degree, dtype=np.int64)
+    for post in range(num_neurons):
+        choices = rng.choice(num_neurons - 1, size=in_degree, replace=False)
+        choices += choices >= post
+        pre[post * in_degree:(post + 1) * in_degree] = choices
+    return pre, np.repeat(np.arange(num_neurons, dtype=np.int64), in_degree)
+def sample_edges(num_neurons, connectivity_pattern, connection_prob=None, in_degree=None, rng=None):
+    rng = np.random.default_rng(rng)
+    if connectivity_pattern == 'All-to-All':
+        pre, post = all_to_all_edges(num_neurons)
+    elif connectivity_pattern == 'Random':
+        pre, post = bernoulli_edges(num_neurons, connection_prob, rng)
+    elif connectivity_pattern == 'Fixed In-Degree':
+        pre, post = fixed_in_degree_edges(num_neurons, in_degree, rng)
+    else:
+        raise ValueError(f"Unknown connectivity pattern: {connectivity_pattern}")
+    order = np.lexsort((pre, post))
+    return pre[order], post[order]
+def adjacency_csr(pre, post, num_neurons):
+    order = np.lexsort((pre, post))
+    indptr = np.zeros(num_neurons + 1, dtype=np.int64)
+    np.cumsum(np.bincount(post, minlength=num_neurons), out=indptr[1:])
+    return indptr, pre[order]
@@ -0,0 +1,52 @@
+import numpy as np
+def minmax_downsample(time, values, num_buckets):
+    time = np.asarray(time)
+    values = np.asarray(values)
+    num_samples = len(values)
+    if num_buckets <= 0 or num_samples <= 2 * num_buckets:
+        return time, values
+    bucket_size = -(-num_samples // num_buckets)
+    num_full = num_samples // bucket_size
+    body = values[:num_full * bucket_size].reshape(num_full, bucket_size)
+    offsets = np.arange(num_full) * bucket_size
+    indices = [np.array([0, num_samples - 1]), offsets + body.argmin(axis=1), offsets + body.argmax(axis=1)]
+    tail_start = num_full * bucket_size
+    if tail_start < num_samples:
+        tail = values[tail_start:]
+        indices.append(np.array([tail_start + tail.argmin(), tail_start + tail.argmax()]))
+    keep = np.unique(np.concatenate(indices))
+    return time[keep], values[keep]
+def lttb_downsample(time, values, num_points):
+    time = np.asarray(time)
+    values = np.asarray(values)
+    if values.ndim == 1:
+        keep = lttb_indices(time, values[np.newaxis], num_points)[0]
+        return time[keep], values[keep]
+    keep = lttb_indices(time, values, num_points)
+    return [(time[row_keep], row[row_keep]) for row, row_keep in zip(values, keep)]
+def lttb_indices(time, values, num_points):
+    num_traces, num_samples = values.shape
+    if num_points < 3 or num_samples <= num_points:
+        return np.tile(np.arange(num_samples), (num_traces, 1))
+    edges = np.linspace(1, num_samples - 1, num_points - 1).astype(np.int64)
+    next_edges = np.append(edges[2:], num_samples)
+    sizes = next_edges - edges[1:]
+    next_time = np.add.reduceat(time, edges[1:])[:len(sizes)] / sizes
+    next_values = np.add.reduceat(values, edges[1:], axis=1)[:, :len(sizes)] / sizes
+    rows = np.arange(num_traces)
+    keep = np.empty((num_traces, num_points), dtype=np.int64)
+    keep[:, 0] = 0
+    keep[:, -1] = num_samples - 1
+    selected = np.zeros(num_traces, dtype=np.int64)
+    for k in range(num_points - 2):
+        start, stop = edges[k], edges[k + 1]
+        selected_time = time[selected][:, np.newaxis]
+        selected_values = values[rows, selected][:, np.newaxis]
+        areas = np.abs((selected_time - next_time[k]) * (values[:, start:stop] - selected_values) - (selected_time - time[start:stop]) * (next_values[:, k:k + 1] - selected_values))
+        selected = start + areas.argmax(axis=1)
+        keep[:, k + 1] = selected
+    return keep
+def downsample_traces(time, voltages, max_points, method='minmax'):
+    if method == 'lttb':
+        return lttb_downsample(time, np.atleast_2d(voltages), max_points) if len(voltages) else []
+    return [minmax_downsample(time, v_soma, max_points // 2) for v_soma in voltages]
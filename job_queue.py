@@ -0,0 +1,89 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from cli import resolve_config, run_from_config, sweep_from_config, design_from_config
+from mechanisms import initialize_runtime
+JOB_KINDS = ['run', 'sweep', 'design']
+def execute_job(job_id, kind, config, progress, states):
+    if states.setdefault(job_id, 'running') == 'cancelled':
+        return None
+    def report(fraction):
+        progress[job_id] = fraction
+    config = resolve_config(config)
+    if kind == 'run':
+        result = run_from_config(config, morphology=True)
+    elif kind == 'sweep':
+        result = sweep_from_config(config, report)
+    else:
+        result = design_from_config(config, report)
+    report(1.0)
+    return result
+class JobQueue:
+    def __init__(self, max_workers=1, retention_s=900):
+        mp_context = multiprocessing.get_context('spawn')
+        self.max_workers = max_workers
+        self.retention_s = retention_s
+        self._manager = mp_context.Manager()
+        self._progress = self._manager.dict()
+        self._states = self._manager.dict()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context, initializer=initialize_runtime)
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    def submit(self, kind, config, owner=None, label=None):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.expire()
+        with self._lock:
+            job_id = next(self._ids)
+            self._progress[job_id] = 0.0
+            future = self._executor.submit(execute_job, job_id, kind, config, self._progress, self._states)
+            self._jobs[job_id] = {'id': job_id, 'kind': kind, 'label': label or kind, 'owner': owner, 'config': config, 'submitted': time.time(), 'finished': None, 'future': future}
+            future.add_done_callback(lambda _, job=self._jobs[job_id]: job.update(finished=time.time()))
+        return job_id
+    def status(self, job_id):
+        future = self._jobs[job_id]['future']
+        state = self._states.get(job_id)
+        if future.cancelled() or state == 'cancelled':
+            return 'cancelled'
+        if future.done():
+            return 'failed' if future.exception() is not None else 'done'
+        return state or 'queued'
+    def progress(self, job_id):
+        return 1.0 if self.status(job_id) == 'done' else self._progress.get(job_id, 0.0)
+    def result(self, job_id):
+        return self._jobs[job_id]['future'].result()
+    def error(self, job_id):
+        future = self._jobs[job_id]['future']
+        return future.exception() if future.done() and not future.cancelled() else None
+    def cancel(self, job_id):
+        if self._jobs[job_id]['future'].cancel():
+            return True
+        return self._states.setdefault(job_id, 'cancelled') == 'cancelled'
+    def forget(self, job_id):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            job['future'].cancel()
+            self._progress.pop(job_id, None)
+            self._states.pop(job_id, None)
+    def expire(self):
+        cutoff = time.time() - self.retention_s
+        for job in list(self._jobs.values()):
+            if job['finished'] is not None and job['finished'] < cutoff:
+                self.forget(job['id'])
+    def jobs(self, owner=None):
+        self.expire()
+        summaries = []
+        for job in list(self._jobs.values()):
+            if owner is not None and job['owner'] != owner:
+                continue
+            elapsed = (job['finished'] or time.time()) - job['submitted']
+            summaries.append({'id': job['id'], 'kind': job['kind'], 'label': job['label'], 'status': self.status(job['id']), 'progress': self.progress(job['id']), 'elapsed_s': elapsed})
+        return summaries
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
@@ -2,38 +2,27 @@ import matplotlib.pyplot as plt
 import pandas as pd
 from mpl_toolkits.mplot3d import Axes3D
 from neuron import h
-def plot_neuron_morphology_matplotlib(neuron_models):
+from downsampling import downsample_traces
+from morphology import morphology_traces
+from parameter_sweep import heatmap_table
+def plot_neuron_morphology_matplotlib(morphology, group_by='neuron'):
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
-    colors = plt.cm.get_cmap('tab10', len(neuron_models))
-    for i, model_dict in enumerate(neuron_models):
-        color = colors(i)
-        sections_to_plot = [model_dict['soma']] + model_dict['dendrites']
-        if model_dict['axon']:
-            sections_to_plot.append(model_dict['axon'])
-        for sec in sections_to_plot:
-            npts = sec.n3d()
-            if npts == 0:
-                sec.pt3dclear()
-                sec.pt3dadd(0, 0, 0, sec.diam)
-                sec.pt3dadd(sec.L, 0, 0, sec.diam)
-                npts = 2
-            x = [sec.x3d(j) for j in range(npts)]
-            y = [sec.y3d(j) for j in range(npts)]
-            z = [sec.z3d(j) for j in range(npts)]
-            ax.plot(x, y, z, color=color, linewidth=2, label=f'Neuron {i} - {sec.name()}')
+    colors = plt.get_cmap('tab10')
+    for i, (name, xyz, labels) in enumerate(morphology_traces(morphology, group_by)):
+        ax.plot(xyz[:, 0], xyz[:, 1], xyz[:, 2], color=colors(i % colors.N), linewidth=2, label=name)
     ax.set_xlabel('X (µm)')
     ax.set_ylabel('Y (µm)')
     ax.set_zlabel('Z (µm)')
     ax.set_title("Neuron Morphology")
     return fig
-def plot_membrane_potential_matplotlib(data, num_neurons):
+def plot_membrane_potential_matplotlib(time, voltages, max_points=2000, method='minmax', title='Membrane Potential Traces', ylabel='Membrane Potential (mV)', neurons=None):
     fig, ax = plt.subplots()
-    for i in range(num_neurons):
-        ax.plot(data['time'], data[f'neuron_{i}_v_soma'], label=f'Neuron {i}')
+    for i, (trace_time, v_soma) in enumerate(downsample_traces(time, voltages, max_points, method)):
+        ax.plot(trace_time, v_soma, label=f'Neuron {i if neurons is None else neurons[i]}')
     ax.set_xlabel('Time (ms)')
-    ax.set_ylabel('Membrane Potential (mV)')
-    ax.set_title('Membrane Potential Traces')
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
     ax.legend()
     ax.grid(True)
     return fig
@@ -55,3 +44,55 @@ def plot_batch_results_matplotlib(batch_results):
     ax.grid(True)
     return fig
 
+def plot_run_comparison_matplotlib(runs, neuron_index, max_points=2000, method='minmax'):
+    fig, ax = plt.subplots()
+    for name, result in runs:
+        voltages = result['v_soma']
+        if neuron_index >= len(voltages):
+            continue
+        trace_time, v_soma = downsample_traces(result['time'], [voltages[neuron_index]], max_points, method)[0]
+        ax.plot(trace_time, v_soma, label=name)
+    ax.set_xlabel('Time (ms)')
+    ax.set_ylabel('Membrane Potential (mV)')
+    ax.set_title(f'Neuron {neuron_index} Membrane Potential Across Runs')
+    ax.legend()
+    ax.grid(True)
+    return fig
+def plot_sweep_comparison_matplotlib(sweeps):
+    fig, ax = plt.subplots()
+    for name, result in sweeps:
+        ax.plot(result['param_value'], result['avg_firing_rate'], marker='o', linestyle='-', label=f"{name} ({result['param_name'][0]})")
+    ax.set_xlabel('Parameter Value')
+    ax.set_ylabel('Average Firing Rate (Hz)')
+    ax.set_title('Network Firing Rate Across Sweeps')
+    ax.legend()
+    ax.grid(True)
+    return fig
+def plot_sweep_heatmap_matplotlib(results, x, y, metric, bins=10):
+    table = heatmap_table(results, x, y, metric, bins)
+    fig, ax = plt.subplots()
+    image = ax.imshow(table.values, origin='lower', aspect='auto', cmap='viridis')
+    ax.set_xticks(range(len(table.columns)), [f'{value:.3g}' for value in table.columns], rotation=45)
+    ax.set_yticks(range(len(table.index)), [f'{value:.3g}' for value in table.index])
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.set_title(f"{metric} over {x} and {y}")
+    fig.colorbar(image, ax=ax, label=metric)
+    return fig
+def plot_population_analytics_matplotlib(analytics):
+    fig, (rate_ax, isi_ax, neuron_ax) = plt.subplots(1, 3, figsize=(15, 4))
+    rate_ax.step(analytics['time'], analytics['population_rate'], where='mid')
+    rate_ax.set_xlabel('Time (ms)')
+    rate_ax.set_ylabel('Rate (Hz)')
+    rate_ax.set_title('Population Rate')
+    isi_ax.stairs(analytics['isi_hist'], analytics['isi_edges'], fill=True)
+    isi_ax.set_xlabel('ISI (ms)')
+    isi_ax.set_ylabel('Count')
+    isi_ax.set_title('ISI Distribution')
+    neuron_ax.bar(range(len(analytics['mean_rates'])), analytics['mean_rates'])
+    neuron_ax.set_xlabel('Neuron Index')
+    neuron_ax.set_ylabel('Rate (Hz)')
+    neuron_ax.set_title('Mean Rate per Neuron')
+    fig.suptitle(f"Population Analytics (synchrony χ = {analytics['synchrony']:.3f})")
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,84 @@
+import os
+import platform
+import neuron
+from neuron import h
+ARCHITECTURES = [platform.machine(), 'x86_64', 'arm64', 'aarch64', 'i686']
+LIBRARY_NAME = 'nrnmech.dll' if os.name == 'nt' else f"{getattr(neuron, 'mechanism_prefix', 'lib')}nrnmech{getattr(neuron, 'mechanism_suffix', '.so')}"
+_loaded_libraries = {}
+_available = None
+_discovered = False
+_warmed_up = False
+def library_path(directory):
+    if os.name == 'nt':
+        candidates = [os.path.join(directory, LIBRARY_NAME)]
+    else:
+        candidates = [os.path.join(directory, arch, subdir, LIBRARY_NAME) for arch in dict.fromkeys(ARCHITECTURES) for subdir in ('', '.libs')]
+    return next((os.path.realpath(path) for path in candidates if os.path.exists(path)), None)
+def _record_preloaded():
+    for directory in [os.getcwd()] + list(getattr(neuron, 'nrn_dll_loaded', [])):
+        path = library_path(directory)
+        if path is not None:
+            _loaded_libraries.setdefault(path, None)
+_record_preloaded()
+def search_directories():
+    here = os.path.dirname(os.path.abspath(__file__))
+    return list(dict.fromkeys([os.getcwd(), here, os.path.join(here, 'mechanisms')]))
+def discover_libraries(directories=None):
+    paths = [library_path(directory) for directory in (directories or search_directories())]
+    return list(dict.fromkeys(path for path in paths if path is not None))
+def mechanism_names(point_process=False):
+    mechanism_type = h.MechanismType(1 if point_process else 0)
+    name = h.ref('')
+    names = []
+    for i in range(int(mechanism_type.count())):
+        mechanism_type.select(i)
+        mechanism_type.selected(name)
+        names.append(name[0])
+    return names
+def available_mechanisms():
+    global _available
+    if _available is None:
+        _available = frozenset(mechanism_names()) | frozenset(mechanism_names(point_process=True))
+    return _available
+def load_library(path):
+    global _available
+    path = os.path.realpath(path)
+    if path in _loaded_libraries:
+        return False
+    before = available_mechanisms()
+    h.nrn_load_dll(path)
+    _available = None
+    _loaded_libraries[path] = sorted(available_mechanisms() - before)
+    return True
+def load_mechanisms(directories=None):
+    global _discovered
+    if directories is None and _discovered:
+        return available_mechanisms()
+    for path in discover_libraries(directories):
+        load_library(path)
+    _discovered = _discovered or directories is None
+    return available_mechanisms()
+def loaded_libraries():
+    return dict(_loaded_libraries)
+def require_mechanisms(*names):
+    missing = [name for name in names if name not in available_mechanisms()]
+    if missing:
+        raise ValueError(f"Mechanisms not available: {', '.join(missing)}; compile them with nrnivmodl")
+def warm_up():
+    global _warmed_up
+    if _warmed_up:
+        return
+    h.load_file('stdrun.hoc')
+    dt = h.dt
+    sec = h.Section(name='warm_up')
+    sec.insert('hh')
+    h.finitialize(-65)
+    for _ in range(10):
+        h.fadvance()
+    h.delete_section(sec=sec)
+    h.dt = dt
+    h.t = 0
+    _warmed_up = True
+def initialize_runtime(directories=None):
+    load_mechanisms(directories)
+    warm_up()
@@ -0,0 +1,56 @@
+import numpy as np
+SECTION_TYPES = ['soma', 'dendrite', 'axon']
+def model_sections(model_dict):
+    sections = [('soma', model_dict['soma'])] + [('dendrite', sec) for sec in model_dict['dendrites']]
+    if model_dict['axon'] is not None:
+        sections.append(('axon', model_dict['axon']))
+    return sections
+def section_points(sec):
+    npts = int(sec.n3d())
+    if npts == 0:
+        return np.array([[0.0, 0.0, 0.0], [sec.L, 0.0, 0.0], [np.nan, np.nan, np.nan]])
+    points = np.empty((npts + 1, 3))
+    points[:npts, 0] = [sec.x3d(j) for j in range(npts)]
+    points[:npts, 1] = [sec.y3d(j) for j in range(npts)]
+    points[:npts, 2] = [sec.z3d(j) for j in range(npts)]
+    points[npts] = np.nan
+    return points
+def grid_offsets(num_cells, spacing):
+    num_cols = max(1, int(np.ceil(np.sqrt(num_cells))))
+    index = np.arange(num_cells)
+    return np.column_stack([(index % num_cols) * spacing, (index // num_cols) * spacing, np.zeros(num_cells)])
+def extract_morphology(neuron_models, spacing=None):
+    blocks = []
+    cell_bounds = []
+    for model_dict in neuron_models:
+        sections = model_sections(model_dict)
+        points = [section_points(sec) for _, sec in sections]
+        xyz = np.concatenate(points)
+        blocks.append((sections, points, xyz))
+        cell_bounds.append((np.nanmin(xyz, axis=0), np.nanmax(xyz, axis=0)))
+    if not blocks:
+        return {'xyz': np.empty((0, 3)), 'neuron': np.empty(0, dtype=np.int64), 'section_type': np.empty(0, dtype=object), 'section_name': np.empty(0, dtype=object)}
+    lower = np.array([bounds[0] for bounds in cell_bounds])
+    upper = np.array([bounds[1] for bounds in cell_bounds])
+    if spacing is None:
+        extent = (upper - lower)[:, :2].max()
+        spacing = 1.5 * extent if extent > 0 else 50.0
+    offsets = grid_offsets(len(blocks), spacing) - lower
+    xyz = np.concatenate([block[2] + offset for block, offset in zip(blocks, offsets)])
+    lengths = [len(points) for sections, section_points_list, _ in blocks for points in section_points_list]
+    neuron = np.repeat(np.arange(len(blocks)), [len(block[2]) for block in blocks])
+    section_type = np.repeat(np.array([sec_type for sections, _, _ in blocks for sec_type, _ in sections], dtype=object), lengths)
+    section_name = np.repeat(np.array([sec.name() for sections, _, _ in blocks for _, sec in sections], dtype=object), lengths)
+    return {'xyz': xyz, 'neuron': neuron, 'section_type': section_type, 'section_name': section_name}
+def morphology_traces(morphology, group_by='neuron'):
+    if group_by == 'neuron':
+        groups = [(f'Neuron {i}', morphology['neuron'] == i) for i in np.unique(morphology['neuron'])]
+    elif group_by == 'section_type':
+        groups = [(sec_type, morphology['section_type'] == sec_type) for sec_type in SECTION_TYPES if (morphology['section_type'] == sec_type).any()]
+    else:
+        raise ValueError(f"Unknown morphology grouping: {group_by}")
+    traces = []
+    for name, mask in groups:
+        labels = [f'Neuron {i} - {sec_name}' for i, sec_name in zip(morphology['neuron'][mask], morphology['section_name'][mask])]
+        traces.append((name, morphology['xyz'][mask], labels))
+    return traces
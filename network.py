@@ -0,0 +1,100 @@
+import numpy as np
+from neuron import h
+from connectivity import sample_edges, adjacency_csr
+from mechanisms import load_mechanisms
+from neuron_models import create_neuron_model, create_synapse, create_iclamp, create_netstim, create_vclamp
+class Network:
+    def __init__(self, num_neurons, model_choice, rm, cm):
+        load_mechanisms()
+        self.models = [create_neuron_model(model_choice, rm, cm, define_shape=False) for _ in range(num_neurons)]
+        h.define_shape()
+        self.spike_sources = []
+        for model_dict in self.models:
+            if model_dict['axon'] is not None:
+                self.spike_sources.append(h.APCount(model_dict['axon'](1)))
+            else:
+                self.spike_sources.append(None)
+        self.synapses = []
+        self.netcons = []
+        self.edges = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self.adjacency = adjacency_csr(*self.edges, num_neurons)
+        self.iclamp = None
+        self.vclamp = None
+        self.stim_synapse = None
+        self.netstim = None
+        self.stim_netcon = None
+    @property
+    def sections(self):
+        return [sec for model_dict in self.models for sec in [model_dict['soma']] + model_dict['dendrites'] + ([model_dict['axon']] if model_dict['axon'] is not None else [])]
+    @property
+    def point_processes(self):
+        stimuli = [self.iclamp, self.vclamp, self.stim_synapse, self.netstim]
+        return [source for source in self.spike_sources if source is not None] + self.synapses + [point for point in stimuli if point is not None]
+    def object_counts(self):
+        return {'sections': len(self.sections), 'point_processes': len(self.point_processes), 'NetCon': len(self.netcons) + (self.stim_netcon is not None)}
+    def teardown(self):
+        self.stim_netcon = None
+        self.netstim = None
+        self.stim_synapse = None
+        self.iclamp = None
+        self.vclamp = None
+        self.netcons = []
+        self.synapses = []
+        self.spike_sources = []
+        for sec in self.sections:
+            h.delete_section(sec=sec)
+        self.models = []
+        self.edges = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self.adjacency = adjacency_csr(*self.edges, 0)
+    def connect(self, connectivity_pattern, connection_prob=None, weight=0.02, delay=1, in_degree=None, rng=None):
+        pre, post = sample_edges(len(self.models), connectivity_pattern, connection_prob, in_degree, rng)
+        self.edges = (pre, post)
+        self.adjacency = adjacency_csr(pre, post, len(self.models))
+        if not self.synapses:
+            self.synapses = [create_synapse(model_dict['soma'], 'ExpSyn') for model_dict in self.models]
+        self.netcons = []
+        for i, j in zip(pre.tolist(), post.tolist()):
+            if self.spike_sources[i] is not None:
+                netcon = h.NetCon(self.spike_sources[i], self.synapses[j])
+            else:
+                pre_soma = self.models[i]['soma']
+                netcon = h.NetCon(pre_soma(1)._ref_v, self.synapses[j], sec=pre_soma)
+            netcon.weight[0] = weight
+            netcon.delay = delay
+            self.netcons.append(netcon)
+    def set_weight(self, weight):
+        for netcon in self.netcons:
+            netcon.weight[0] = weight
+    def set_delay(self, delay):
+        for netcon in self.netcons:
+            netcon.delay = delay
+    def set_passive(self, rm, cm):
+        for sec in self.sections:
+            sec.g_pas = 1 / rm
+            sec.cm = cm
+    def set_iclamp(self, target, delay, dur, amp):
+        if self.iclamp is None:
+            self.iclamp = create_iclamp(self.models[target]['soma'], delay, dur, amp)
+        else:
+            self.iclamp.delay = delay
+            self.iclamp.dur = dur
+            self.iclamp.amp = amp
+        return self.iclamp
+    def set_netstim(self, target, syn_type, weight, noise=0, random_ids=None):
+        if self.stim_netcon is None:
+            self.stim_synapse = create_synapse(self.models[target]['soma'], syn_type)
+            self.netstim = create_netstim(h, noise, random_ids)
+            self.stim_netcon = h.NetCon(self.netstim, self.stim_synapse)
+        else:
+            self.netstim.noise = noise
+            if random_ids is not None:
+                self.netstim.noiseFromRandom123(*random_ids)
+        self.stim_netcon.weight[0] = weight
+        return self.stim_netcon
+    def set_vclamp(self, target, dur, level):
+        if self.vclamp is None:
+            self.vclamp = create_vclamp(self.models[target]['soma'], dur, level)
+        else:
+            self.vclamp.dur[0] = dur
+            self.vclamp.amp[0] = level
+        return self.vclamp
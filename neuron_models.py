@@ -1,11 +1,6 @@
-import random
 from neuron import h
-def create_neuron_model(model_name, rm, cm):
-    try:
-        h.nrn_load_dll("./channels.dll")
-    except RuntimeError:
-        print("channels.dll not found. Using default channels.")
-    h.pop_section()
+MODEL_SECTIONS = {'Simple Soma': ['soma'], 'Dendrite (Passive)': ['soma', 'dend'], 'Multi-Compartment': ['soma', 'dend1', 'dend2', 'dend3', 'axon']}
+def create_neuron_model(model_name, rm, cm, define_shape=True):
     if model_name == 'Simple Soma':
         soma = h.Section(name='soma')
         soma.L = 10
@@ -16,7 +11,8 @@ def create_neuron_model(model_name, rm, cm):
         soma.e_pas = -65
         soma.cm = cm
         soma.insert('hh')
-        h.define_shape()
+        if define_shape:
+            h.define_shape()
         return {'soma': soma, 'dendrites': [], 'axon': None}
     elif model_name == 'Dendrite (Passive)':
         soma = h.Section(name='soma')
@@ -30,7 +26,8 @@ def create_neuron_model(model_name, rm, cm):
             sec.g_pas = 1 / rm
             sec.e_pas = -65
             sec.cm = cm
-        h.define_shape()
+        if define_shape:
+            h.define_shape()
         return {'soma': soma, 'dendrites': [dend], 'axon': None}
     elif model_name == 'Multi-Compartment':
         soma = h.Section(name='soma')
@@ -52,7 +49,8 @@ def create_neuron_model(model_name, rm, cm):
             sec.cm = cm
         soma.insert('hh')
         axon.insert('hh')
-        h.define_shape()
+        if define_shape:
+            h.define_shape()
         return {'soma': soma, 'dendrites': [dend1, dend2, dend3], 'axon': axon}
     return None
 def create_synapse(neuron_section, syn_type):
@@ -66,11 +64,14 @@ def create_synapse(neuron_section, syn_type):
         syn.tau2 = 2
         syn.e = 0
     return syn
-def create_netstim(h_obj):
+def create_netstim(h_obj, noise=0, random_ids=None):
     netstim = h_obj.NetStim()
     netstim.number = 1
     netstim.start = 250
     netstim.interval = 100
+    netstim.noise = noise
+    if random_ids is not None:
+        netstim.noiseFromRandom123(*random_ids)
     return netstim
 def create_iclamp(section, delay, dur, amp):
     iclamp = h.IClamp(section(0.5))
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+SWEEP_PARAMETERS = {
+    'rm': {'label': 'Membrane Resistance (kOhm-cm²)', 'min': 100.0, 'max': 50000.0, 'default': 10000.0, 'range': (5000.0, 20000.0)},
+    'cm': {'label': 'Membrane Capacitance (uF/cm²)', 'min': 0.1, 'max': 5.0, 'default': 1.0, 'range': (0.5, 2.0)},
+    'stim_amp': {'label': 'Stimulus Amplitude (nA)', 'min': -10.0, 'max': 10.0, 'default': 2.0, 'range': (0.1, 2.0)},
+    'stim_delay': {'label': 'Stimulus Delay (ms)', 'min': 0.0, 'max': 5000.0, 'default': 100.0, 'range': (50.0, 150.0)},
+    'stim_dur': {'label': 'Stimulus Duration (ms)', 'min': 1.0, 'max': 5000.0, 'default': 100.0, 'range': (50.0, 200.0)},
+    'syn_weight': {'label': 'Stimulus Synaptic Weight', 'min': 0.0, 'max': 1.0, 'default': 0.05, 'range': (0.01, 0.2)},
+    'stim_noise': {'label': 'Stimulus Noise (NetStim)', 'min': 0.0, 'max': 1.0, 'default': 0.0, 'range': (0.0, 1.0)},
+    'connection_prob': {'label': 'Connection Probability', 'min': 0.0, 'max': 1.0, 'default': 0.2, 'range': (0.05, 0.5)},
+    'netcon_delay': {'label': 'NetCon Delay (ms)', 'min': 0.1, 'max': 50.0, 'default': 1.0, 'range': (1.0, 10.0)},
+}
+SAMPLING_METHODS = ['grid', 'lhs', 'random']
+METRICS = ['firing_rate', 'isi_cv', 'first_spike_latency', 'spike_count']
+def default_params():
+    return {name: spec['default'] for name, spec in SWEEP_PARAMETERS.items()}
+def _check_names(names):
+    unknown = [name for name in names if name not in SWEEP_PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(unknown)}")
+def grid_design(values):
+    _check_names(values)
+    names = list(values)
+    mesh = np.meshgrid(*[np.asarray(values[name], dtype=np.float64) for name in names], indexing='ij')
+    return pd.DataFrame({name: axis.ravel() for name, axis in zip(names, mesh)})
+def latin_hypercube_design(bounds, num_samples, rng=None):
+    _check_names(bounds)
+    rng = np.random.default_rng(rng)
+    low, high = np.array(list(bounds.values()), dtype=np.float64).reshape(-1, 2).T
+    strata = rng.permuted(np.tile(np.arange(num_samples), (len(bounds), 1)), axis=1).T
+    unit = (strata + rng.random((num_samples, len(bounds)))) / num_samples
+    return pd.DataFrame(low + unit * (high - low), columns=list(bounds))
+def random_design(bounds, num_samples, rng=None):
+    _check_names(bounds)
+    rng = np.random.default_rng(rng)
+    low, high = np.array(list(bounds.values()), dtype=np.float64).reshape(-1, 2).T
+    return pd.DataFrame(rng.uniform(low, high, (num_samples, len(bounds))), columns=list(bounds))
+def make_design(method, bounds, num_points, rng=None):
+    if method == 'grid':
+        return grid_design({name: np.linspace(low, high, num_points) for name, (low, high) in bounds.items()})
+    if method == 'lhs':
+        return latin_hypercube_design(bounds, num_points, rng)
+    if method == 'random':
+        return random_design(bounds, num_points, rng)
+    raise ValueError(f"Unknown sampling method: {method}")
+def summarize_design(results, params):
+    summary = pd.DataFrame(results).groupby(params)[METRICS].agg(['mean', 'std'])
+    summary.columns = [f'{metric}_{statistic}' for metric, statistic in summary.columns]
+    return summary.reset_index()
+def heatmap_table(results, x, y, metric, bins=10):
+    table = pd.DataFrame(results)[[x, y, metric]].copy()
+    for name in (x, y):
+        if table[name].nunique() > bins:
+            table[name] = pd.cut(table[name], bins).map(lambda interval: interval.mid).astype(np.float64)
+    return table.pivot_table(index=y, columns=x, values=metric, aggfunc='mean')
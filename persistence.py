@@ -0,0 +1,82 @@
+import json
+import os
+from collections.abc import Mapping
+import numpy as np
+FORMAT_VERSION = 1
+class StoredResult(Mapping):
+    def __init__(self, arrays, metadata):
+        self._arrays = arrays
+        self._decoded = {}
+        self.metadata = metadata
+        self.kind = metadata['kind']
+        self.params = metadata.get('params', {})
+    def _array(self, key):
+        if key not in self._decoded:
+            self._decoded[key] = self._arrays[key]
+        return self._decoded[key]
+    def __getitem__(self, key):
+        if key == 'spikes' and 'spike_counts' in self._arrays:
+            return np.split(self._array('spike_times'), np.cumsum(self._array('spike_counts'))[:-1])
+        if key == 'param_name' and self.kind == 'sweep':
+            return [self.metadata['param_name']] * len(self._array('param_value'))
+        if key == 'recordings' and self.metadata.get('recordings'):
+            return {name: {field: self._array(f'recording_{k}_{field}') for field in ('time', 'values', 'neurons')} for k, name in enumerate(self.metadata['recordings'])}
+        if key in ('spike_times', 'spike_counts', 'metadata') or key.startswith('recording_'):
+            raise KeyError(key)
+        return self._array(key)
+    def shape(self, key):
+        if key in self.metadata.get('shapes', {}):
+            return tuple(self.metadata['shapes'][key])
+        return np.shape(self[key])
+    def _keys(self):
+        keys = [key for key in self._arrays if key not in ('spike_times', 'spike_counts', 'metadata') and not key.startswith('recording_')]
+        if 'spike_counts' in self._arrays:
+            keys.append('spikes')
+        if self.metadata.get('recordings'):
+            keys.append('recordings')
+        if self.kind == 'sweep':
+            keys.append('param_name')
+        return keys
+    def __iter__(self):
+        return iter(self._keys())
+    def __len__(self):
+        return len(self._keys())
+def _run_arrays(data):
+    arrays = {'time': np.asarray(data['time']), 'v_soma': np.asarray(data['v_soma'])}
+    if 'spikes' in data:
+        arrays['spike_times'] = np.concatenate([np.asarray(spikes, dtype=np.float64) for spikes in data['spikes']]) if data['spikes'] else np.empty(0)
+        arrays['spike_counts'] = np.array([len(spikes) for spikes in data['spikes']], dtype=np.int64)
+    for k, recording in enumerate(data.get('recordings', {}).values()):
+        for field in ('time', 'values', 'neurons'):
+            arrays[f'recording_{k}_{field}'] = np.asarray(recording[field])
+    return arrays
+def _sweep_arrays(batch_results):
+    return {key: np.asarray(value) for key, value in batch_results.items() if key != 'param_name'}
+def _write(target, arrays, metadata, compress):
+    metadata = {**metadata, 'shapes': {key: list(value.shape) for key, value in arrays.items()}}
+    if compress:
+        np.savez_compressed(target, metadata=np.array(json.dumps(metadata)), **arrays)
+        return
+    os.makedirs(target, exist_ok=True)
+    for key, value in arrays.items():
+        np.save(os.path.join(target, f'{key}.npy'), value)
+    with open(os.path.join(target, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+def save_run(target, data, params, compress=True):
+    metadata = {'kind': 'run', 'version': FORMAT_VERSION, 'params': params, 'recordings': list(data.get('recordings', {}))}
+    _write(target, _run_arrays(data), metadata, compress)
+def save_sweep(target, batch_results, params, compress=True):
+    metadata = {'kind': 'sweep', 'version': FORMAT_VERSION, 'param_name': batch_results['param_name'][0] if len(batch_results['param_name']) else None, 'params': params}
+    _write(target, _sweep_arrays(batch_results), metadata, compress)
+def load_results(source, mmap=True):
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        with open(os.path.join(source, 'metadata.json')) as f:
+            metadata = json.load(f)
+        arrays = {}
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.npy'):
+                arrays[name[:-4]] = np.load(os.path.join(source, name), mmap_mode='r' if mmap else None, allow_pickle=False)
+        return StoredResult(arrays, metadata)
+    archive = np.load(source, allow_pickle=False)
+    metadata = json.loads(str(archive['metadata']))
+    return StoredResult(archive, metadata)
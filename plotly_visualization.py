@@ -1,40 +1,50 @@
 import plotly.graph_objects as go
 import plotly.express as px
+from plotly.subplots import make_subplots
 from neuron import h
-def plot_neuron_morphology_plotly(neuron_models):
+from downsampling import downsample_traces
+from morphology import morphology_traces
+from parameter_sweep import heatmap_table
+WEBGL_POINT_THRESHOLD = 50000
+def plot_neuron_morphology_plotly(morphology, group_by='neuron'):
     data = []
     colors = px.colors.qualitative.Plotly
-    for i, model_dict in enumerate(neuron_models):
-        color = colors[i % len(colors)]
-        sections_to_plot = [model_dict['soma']] + model_dict['dendrites']
-        if model_dict['axon']:
-            sections_to_plot.append(model_dict['axon'])
-        for sec in sections_to_plot:
-            npts = sec.n3d()
-            if npts == 0:
-                sec.pt3dclear()
-                sec.pt3dadd(0, 0, 0, sec.diam)
-                sec.pt3dadd(sec.L, 0, 0, sec.diam)
-                npts = 2
-            x = [sec.x3d(j) for j in range(npts)]
-            y = [sec.y3d(j) for j in range(npts)]
-            z = [sec.z3d(j) for j in range(npts)]
-            data.append(go.Scatter3d(
-                x=x, y=y, z=z,
-                mode='lines',
-                line=dict(color=color, width=4),
-                name=f'Neuron {i} - {sec.name()}'
-            ))
+    for i, (name, xyz, labels) in enumerate(morphology_traces(morphology, group_by)):
+        data.append(go.Scatter3d(
+            x=xyz[:, 0], y=xyz[:, 1], z=xyz[:, 2],
+            mode='lines',
+            line=dict(color=colors[i % len(colors)], width=4),
+            name=name,
+            text=labels,
+            hoverinfo='text'
+        ))
     layout = go.Layout(
         title="Neuron Morphology",
         scene=dict(
             xaxis_title='X (µm)',
             yaxis_title='Y (µm)',
-            zaxis_title='Z (µm)'
+            zaxis_title='Z (µm)',
+            aspectmode='data'
         )
     )
     fig = go.Figure(data=data, layout=layout)
     return fig
+def plot_membrane_potential_plotly(time, voltages, max_points=2000, method='minmax', title='Membrane Potential Traces', ylabel='Membrane Potential (mV)', neurons=None):
+    traces = downsample_traces(time, voltages, max_points, method)
+    scatter = go.Scattergl if sum(len(trace_time) for trace_time, _ in traces) > WEBGL_POINT_THRESHOLD else go.Scatter
+    fig = go.Figure()
+    for i, (trace_time, v_soma) in enumerate(traces):
+        fig.add_trace(scatter(x=trace_time, y=v_soma, mode='lines', name=f'Neuron {i if neurons is None else neurons[i]}'))
+    fig.update_layout(title=title, xaxis_title='Time (ms)', yaxis_title=ylabel)
+    return fig
+def plot_raster_plotly(all_spike_times, all_neuron_indices):
+    scatter = go.Scattergl if len(all_spike_times) > WEBGL_POINT_THRESHOLD else go.Scatter
+    fig = go.Figure()
+    fig.add_trace(scatter(x=all_spike_times, y=all_neuron_indices, mode='markers', marker=dict(symbol='circle', size=4, color='cyan', line=dict(width=1, color='darkblue')), name='Spikes'))
+    fig.update_layout(title='Spike Raster Plot', xaxis_title='Time (ms)', yaxis_title='Neuron Index', yaxis=dict(tickmode='linear', dtick=1), plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+    return fig
 def plot_batch_results(batch_results):
     fig = go.Figure(data=go.Scatter(
         x=batch_results['param_value'],
@@ -53,3 +63,48 @@ def plot_batch_results(batch_results):
     )
     return fig
 
+def plot_run_comparison_plotly(runs, neuron_index, max_points=2000, method='minmax'):
+    fig = go.Figure()
+    for name, result in runs:
+        voltages = result['v_soma']
+        if neuron_index >= len(voltages):
+            continue
+        trace_time, v_soma = downsample_traces(result['time'], [voltages[neuron_index]], max_points, method)[0]
+        fig.add_trace(go.Scatter(x=trace_time, y=v_soma, mode='lines', name=name))
+    fig.update_layout(title=f'Neuron {neuron_index} Membrane Potential Across Runs', xaxis_title='Time (ms)', yaxis_title='Membrane Potential (mV)')
+    return fig
+def plot_sweep_comparison_plotly(sweeps):
+    fig = go.Figure()
+    for name, result in sweeps:
+        fig.add_trace(go.Scatter(x=result['param_value'], y=result['avg_firing_rate'], mode='lines+markers', name=f"{name} ({result['param_name'][0]})"))
+    fig.update_layout(title='Network Firing Rate Across Sweeps', xaxis_title='Parameter Value', yaxis_title='Average Firing Rate (Hz)', template='plotly_white')
+    return fig
+def plot_sweep_heatmap_plotly(results, x, y, metric, bins=10):
+    table = heatmap_table(results, x, y, metric, bins)
+    fig = go.Figure(data=go.Heatmap(
+        z=table.values,
+        x=table.columns,
+        y=table.index,
+        colorscale='Viridis',
+        colorbar=dict(title=metric)
+    ))
+    fig.update_layout(
+        title=f"{metric} over {x} and {y}",
+        xaxis_title=x,
+        yaxis_title=y,
+        template="plotly_white"
+    )
+    return fig
+def plot_population_analytics_plotly(analytics):
+    fig = make_subplots(rows=1, cols=3, subplot_titles=('Population Rate', 'ISI Distribution', 'Mean Rate per Neuron'))
+    fig.add_trace(go.Scatter(x=analytics['time'], y=analytics['population_rate'], mode='lines', line_shape='hv', name='Population rate'), row=1, col=1)
+    fig.add_trace(go.Bar(x=(analytics['isi_edges'][:-1] + analytics['isi_edges'][1:]) / 2, y=analytics['isi_hist'], name='ISIs'), row=1, col=2)
+    fig.add_trace(go.Bar(x=list(range(len(analytics['mean_rates']))), y=analytics['mean_rates'], name='Mean rate'), row=1, col=3)
+    fig.update_xaxes(title_text='Time (ms)', row=1, col=1)
+    fig.update_xaxes(title_text='ISI (ms)', row=1, col=2)
+    fig.update_xaxes(title_text='Neuron Index', row=1, col=3)
+    fig.update_yaxes(title_text='Rate (Hz)', row=1, col=1)
+    fig.update_yaxes(title_text='Count', row=1, col=2)
+    fig.update_yaxes(title_text='Rate (Hz)', row=1, col=3)
+    fig.update_layout(title=f"Population Analytics (synchrony χ = {analytics['synchrony']:.3f})", showlegend=False, template='plotly_white')
+    return fig
@@ -0,0 +1,68 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from neuron import h
+POINT_PROCESS_TYPES = ['ExpSyn', 'Exp2Syn', 'IClamp', 'VClamp', 'NetStim', 'APCount']
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+def neuron_object_counts():
+    counts = {'sections': sum(1 for _ in h.allsec()), 'NetCon': int(h.List('NetCon').count())}
+    for mechanism in POINT_PROCESS_TYPES:
+        counts[mechanism] = int(h.List(mechanism).count())
+    counts['point_processes'] = sum(counts[mechanism] for mechanism in POINT_PROCESS_TYPES)
+    return counts
+class Profiler:
+    def __init__(self):
+        self.spans = []
+        self.counts = []
+        self._origin = time.perf_counter()
+    @contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        rss_before = current_rss_mb()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.spans.append({'name': name, 'start_s': start - self._origin, 'duration_s': end - start, 'rss_before_mb': rss_before, 'rss_after_mb': current_rss_mb(), 'peak_rss_mb': peak_rss_mb(), 'thread': threading.get_ident(), 'args': args})
+    def snapshot_counts(self, label):
+        self.counts.append({'label': label, 'time_s': time.perf_counter() - self._origin, **neuron_object_counts()})
+    def summary(self):
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span['name'], {'stage': span['name'], 'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'rss_delta_mb': 0.0, 'peak_rss_mb': 0.0})
+            stage['calls'] += 1
+            stage['total_s'] += span['duration_s']
+            stage['max_s'] = max(stage['max_s'], span['duration_s'])
+            stage['rss_delta_mb'] += span['rss_after_mb'] - span['rss_before_mb']
+            stage['peak_rss_mb'] = max(stage['peak_rss_mb'], span['peak_rss_mb'])
+        return sorted(stages.values(), key=lambda stage: stage['total_s'], reverse=True)
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            events.append({'name': span['name'], 'ph': 'X', 'ts': span['start_s'] * 1e6, 'dur': span['duration_s'] * 1e6, 'pid': pid, 'tid': span['thread'], 'args': {**span['args'], 'rss_after_mb': span['rss_after_mb']}})
+            events.append({'name': 'rss_mb', 'ph': 'C', 'ts': (span['start_s'] + span['duration_s']) * 1e6, 'pid': pid, 'args': {'rss': span['rss_after_mb']}})
+        for snapshot in self.counts:
+            events.append({'name': 'neuron_objects', 'ph': 'C', 'ts': snapshot['time_s'] * 1e6, 'pid': pid, 'args': {key: value for key, value in snapshot.items() if key not in ('label', 'time_s')}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+class NullProfiler:
+    def span(self, name, **args):
+        return nullcontext()
+    def snapshot_counts(self, label):
+        pass
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+import numpy as np
+def _canonical_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot hash configuration value of type {type(value).__name__}")
+def config_key(config):
+    canonical = json.dumps(config, sort_keys=True, separators=(',', ':'), default=_canonical_default)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+def result_nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(result_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(result_nbytes(item) for item in value)
+    return 0
+def is_deterministic(connectivity_pattern, seed=None, stimulus=None, noise=0.0):
+    if seed is not None:
+        return True
+    return connectivity_pattern == 'All-to-All' and not (stimulus == 'NetStim' and noise > 0)
+class ResultCache:
+    def __init__(self, max_entries=32, cache_dir=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+    def _remember(self, key, value):
+        size = result_nbytes(value) if self.max_bytes is not None else 0
+        if key in self._entries:
+            self.nbytes -= self._sizes.pop(key)
+            del self._entries[key]
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._sizes[key] = size
+        self.nbytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+            evicted, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(evicted)
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            with open(self._path(key), 'rb') as f:
+                value = pickle.load(f)
+            self._remember(key, value)
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.cache_dir is not None:
+            tmp_path = self._path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+    def __contains__(self, key):
+        return key in self._entries or (self.cache_dir is not None and os.path.exists(self._path(key)))
+    def __len__(self):
+        return len(self._entries)
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,13 @@
+import numpy as np
+from result_cache import config_key
+STREAMS = {'connectivity': 0, 'netstim': 1, 'design': 2}
+def seed_sequence(master_seed, stream, *key):
+    if master_seed is None:
+        return np.random.SeedSequence()
+    return np.random.SeedSequence(int(master_seed), spawn_key=(STREAMS[stream],) + tuple(int(k) for k in key))
+def stream_rng(master_seed, stream, *key):
+    return np.random.default_rng(seed_sequence(master_seed, stream, *key))
+def value_key(value):
+    return int(config_key(value)[:16], 16)
+def random123_ids(master_seed, *key):
+    return tuple(int(value) for value in seed_sequence(master_seed, 'netstim', *key).generate_state(3, dtype=np.uint32))
@@ -1,90 +1,450 @@
-import random
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 from neuron import h
-from neuron_models import create_neuron_model, create_synapse, create_iclamp, create_netstim
-def analyze_spikes(voltage_vec, time_vec, threshold):
-    spikes = []
-    refractory_period = 2.0
-    last_spike_time = -refractory_period
-    for j in range(1, len(voltage_vec)):
-        if (voltage_vec[j] > threshold and voltage_vec[j - 1] <= threshold and (time_vec[j] - last_spike_time) > refractory_period):
-            spikes.append(time_vec[j])
-            last_spike_time = time_vec[j]
-    return spikes
+from network import Network
+from result_cache import config_key, is_deterministic
+from profiling import NULL_PROFILER
+from seeding import stream_rng, random123_ids, value_key
+from mechanisms import initialize_runtime
+def analyze_spikes(voltage_vec, time_vec, threshold, refractory_period=2.0, last_spike_time=None):
+    voltages = np.asarray(voltage_vec)
+    times = np.asarray(time_vec)
+    if voltages.ndim == 2:
+        last_spike_times = [None] * len(voltages) if last_spike_time is None else last_spike_time
+        return [analyze_spikes(row, times, threshold, refractory_period, row_last) for row, row_last in zip(voltages, last_spike_times)]
+    crossings = np.flatnonzero((voltages[1:] > threshold) & (voltages[:-1] <= threshold)) + 1
+    crossing_times = times[crossings]
+    keep = np.zeros(len(crossing_times), dtype=bool)
+    if last_spike_time is None:
+        last_spike_time = -refractory_period
+    for k, spike_time in enumerate(crossing_times):
+        if spike_time - last_spike_time > refractory_period:
+            keep[k] = True
+            last_spike_time = spike_time
+    return crossing_times[keep]
+class StreamingSpikeDetector:
+    def __init__(self, threshold, refractory_period=2.0):
+        self.threshold = threshold
+        self.refractory_period = refractory_period
+        self._last_time = None
+        self._last_values = None
+        self._last_spikes = None
+    def detect(self, time_vec, voltage_vec):
+        times = np.asarray(time_vec)
+        voltages = np.asarray(voltage_vec)
+        if not times.size:
+            return [np.empty(0) for _ in voltages]
+        if self._last_values is not None:
+            times = np.concatenate([[self._last_time], times])
+            voltages = np.column_stack([self._last_values, voltages])
+        spikes = analyze_spikes(voltages, times, self.threshold, self.refractory_period, self._last_spikes)
+        self._last_time = times[-1]
+        self._last_values = voltages[:, -1].copy()
+        self._last_spikes = [train[-1] if len(train) else last for train, last in zip(spikes, self._last_spikes or [None] * len(spikes))]
+        return spikes
+def spike_train_metrics(spikes, duration, onset=0.0):
+    counts = np.array([len(train) for train in spikes], dtype=np.int64)
+    firing_rate = counts.sum() / len(spikes) / (duration / 1000) if len(spikes) else 0.0
+    isi_cvs = [isi.std() / isi.mean() for isi in (np.diff(train) for train in spikes if len(train) >= 3) if isi.mean() > 0]
+    first_spikes = [train[np.searchsorted(train, onset)] for train in spikes if len(train) and train[-1] >= onset]
+    return {'firing_rate': float(firing_rate), 'isi_cv': float(np.mean(isi_cvs)) if isi_cvs else np.nan, 'first_spike_latency': float(min(first_spikes) - onset) if first_spikes else np.nan, 'spike_count': int(counts.sum())}
+SOLVERS = ['fixed', 'cvode', 'cvode_local', 'threads']
+RECORDING_VARIABLES = ['v', 'ina', 'ik', 'i_syn']
+def find_section(model_dict, section_name):
+    for sec in [model_dict['soma']] + model_dict['dendrites'] + ([model_dict['axon']] if model_dict['axon'] is not None else []):
+        if sec.name() == section_name:
+            return sec
+    raise ValueError(f"Unknown section: {section_name}")
 class SimulationEngine:
-    def __init__(self, models, duration, dt):
+    def __init__(self, models, duration, dt, record_spikes=False, spike_threshold=-20, dtype=np.float64, solver='fixed', nthread=1, atol=1e-3, rtol=0.0, profiler=None, record_soma=True, recordings=None, synapses=None):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
         self.models = models
         self.duration = duration
         self.dt = dt
+        self.dtype = dtype
+        self.solver = solver
+        self.nthread = nthread
+        self.atol = atol
+        self.rtol = rtol
+        self.profiler = profiler or NULL_PROFILER
+        self.record_soma = record_soma
+        self.synapses = synapses
         self.v_soma_vecs = []
+        self.v_soma_refs = []
+        self.spike_detectors = []
+        self.spike_vecs = []
         self.t_vec = h.Vector()
         for model in self.models:
-            v_vec = h.Vector()
-            v_vec.record(model['soma'](0.5)._ref_v)
-            self.v_soma_vecs.append(v_vec)
-        self.t_vec.record(h._ref_t)
-    def run_simulation(self):
+            if record_soma:
+                v_vec = h.Vector()
+                if self.variable_step:
+                    v_vec.record(model['soma'](0.5)._ref_v, self.dt, sec=model['soma'])
+                    self.v_soma_refs.append(model['soma'](0.5)._ref_v)
+                else:
+                    v_vec.record(model['soma'](0.5)._ref_v, sec=model['soma'])
+                self.v_soma_vecs.append(v_vec)
+            if record_spikes:
+                spike_vec = h.Vector()
+                detector = h.NetCon(model['soma'](0.5)._ref_v, None, sec=model['soma'])
+                detector.threshold = spike_threshold
+                detector.record(spike_vec)
+                self.spike_detectors.append(detector)
+                self.spike_vecs.append(spike_vec)
+        if self.solver == 'fixed' and record_soma:
+            self.t_vec.record(h._ref_t)
+        self.recordings = [self._add_recording(spec) for spec in (recordings or [])]
+        self.stream_state = 'idle'
+        self._samples_emitted = 0
+    def _recording_ref(self, index, section_name, loc, variable):
+        if variable == 'i_syn':
+            if not self.synapses:
+                raise ValueError("Recording i_syn requires the network's synapses")
+            synapse = self.synapses[index]
+            return synapse._ref_i, synapse.get_segment().sec
+        if variable not in RECORDING_VARIABLES:
+            raise ValueError(f"Unknown recording variable: {variable}")
+        sec = find_section(self.models[index], section_name)
+        try:
+            return getattr(sec(loc), f'_ref_{variable}'), sec
+        except AttributeError as e:
+            raise ValueError(f"{variable} is not available at {section_name}({loc})") from e
+    def _add_recording(self, spec):
+        section_name = spec.get('section', 'soma')
+        loc = spec.get('loc', 0.5)
+        variable = spec.get('variable', 'v')
+        interval = spec.get('dt') or self.dt
+        neurons = list(range(len(self.models))) if spec.get('neurons') is None else list(spec['neurons'])
+        vecs = []
+        refs = []
+        for i in neurons:
+            ref, sec = self._recording_ref(i, section_name, loc, variable)
+            vec = h.Vector()
+            vec.record(ref, interval, sec=sec)
+            vecs.append(vec)
+            refs.append(ref)
+        name = spec.get('name') or ('i_syn' if variable == 'i_syn' else f'{section_name}({loc}).{variable}')
+        return {'name': name, 'dt': interval, 'neurons': np.array(neurons, dtype=np.int64), 'vecs': vecs, 'refs': refs, 'emitted': 0}
+    @property
+    def variable_step(self):
+        return self.solver in ('cvode', 'cvode_local')
+    def configure_solver(self):
+        cvode = h.CVode()
+        h.ParallelContext().nthread(self.nthread if self.solver == 'threads' else 1)
+        cvode.use_local_dt(1 if self.solver == 'cvode_local' else 0)
+        cvode.active(1 if self.variable_step else 0)
+        if self.variable_step:
+            cvode.atol(self.atol)
+            cvode.rtol(self.rtol)
+    def _initialize(self):
+        self.configure_solver()
         h.dt = self.dt
         h.t = 0
         h.finitialize(-65)
-        h.continuerun(self.duration)
-        data = {'time': list(self.t_vec)}
-        for i, v_vec in enumerate(self.v_soma_vecs):
-            data[f'neuron_{i}_v_soma'] = list(v_vec)
+        self._samples_emitted = 0
+        for recording in self.recordings:
+            recording['emitted'] = 0
+    def _complete_final_samples(self):
+        records = [(vec, ref, self.dt, self._samples_emitted) for vec, ref in zip(self.v_soma_vecs, self.v_soma_refs)]
+        for recording in self.recordings:
+            records.extend((vec, ref, recording['dt'], recording['emitted']) for vec, ref in zip(recording['vecs'], recording['refs']))
+        for vec, ref, interval, emitted in records:
+            intervals = self.duration / interval
+            if abs(intervals - round(intervals)) < 1e-6 and emitted + len(vec) == round(intervals):
+                vec.append(ref[0])
+    def _drain(self, vecs, num_samples):
+        values = np.empty((len(vecs), num_samples), dtype=self.dtype)
+        for i, vec in enumerate(vecs):
+            values[i] = vec.as_numpy()[:num_samples]
+            if len(vec) == num_samples:
+                vec.resize(0)
+            elif num_samples:
+                vec.remove(0, num_samples - 1)
+        return values
+    def _collect(self):
+        if self.solver == 'fixed':
+            num_samples = len(self.t_vec)
+            time = self.t_vec.as_numpy().copy()
+            self.t_vec.resize(0)
+        else:
+            num_samples = min((len(v_vec) for v_vec in self.v_soma_vecs), default=0)
+            time = (self._samples_emitted + np.arange(num_samples)) * self.dt
+        data = {'time': time, 'v_soma': self._drain(self.v_soma_vecs, num_samples)}
+        if self.spike_vecs:
+            data['spikes'] = [spike_vec.as_numpy().copy() for spike_vec in self.spike_vecs]
+            for spike_vec in self.spike_vecs:
+                spike_vec.resize(0)
+        if self.recordings:
+            data['recordings'] = {}
+            for recording in self.recordings:
+                num_recorded = min(len(vec) for vec in recording['vecs'])
+                time = (recording['emitted'] + np.arange(num_recorded)) * recording['dt']
+                data['recordings'][recording['name']] = {'time': time, 'values': self._drain(recording['vecs'], num_recorded), 'neurons': recording['neurons']}
+                recording['emitted'] += num_recorded
+        self._samples_emitted += num_samples
         return data
+    def _advance(self, stop_time):
+        if self.variable_step:
+            h.CVode().solve(stop_time)
+        else:
+            h.continuerun(stop_time)
+        if stop_time >= self.duration - self.dt / 2:
+            self._complete_final_samples()
+    def run_simulation(self):
+        with self.profiler.span('finitialize'):
+            self._initialize()
+        with self.profiler.span('advance', stop_time=self.duration):
+            self._advance(self.duration)
+        self.stream_state = 'finished'
+        with self.profiler.span('collect'):
+            return self._collect()
+    def stream_simulation(self, chunk_ms):
+        if self.stream_state == 'paused':
+            return
+        if self.stream_state in ('idle', 'finished', 'cancelled'):
+            with self.profiler.span('finitialize'):
+                self._initialize()
+        self.stream_state = 'running'
+        while self.stream_state == 'running' and h.t < self.duration - self.dt / 2:
+            stop_time = min(h.t + chunk_ms, self.duration)
+            with self.profiler.span('advance', stop_time=stop_time):
+                self._advance(stop_time)
+            with self.profiler.span('collect'):
+                chunk = self._collect()
+            yield chunk
+        if self.stream_state == 'running':
+            self.stream_state = 'finished'
     def pause_simulation(self):
-        pass
+        if self.stream_state == 'running':
+            self.stream_state = 'paused'
+    def resume_simulation(self):
+        if self.stream_state == 'paused':
+            self.stream_state = 'running'
+    def cancel_simulation(self):
+        self.stream_state = 'cancelled'
+    def teardown(self):
+        self.stream_state = 'cancelled'
+        self.spike_detectors = []
+        self.spike_vecs = []
+        self.v_soma_vecs = []
+        self.v_soma_refs = []
+        self.recordings = []
+        self.synapses = None
+        self.t_vec = h.Vector()
+        self.models = []
     def reset_simulation(self):
+        self.stream_state = 'idle'
         h.finitialize(-65)
+class StreamAccumulator:
+    def __init__(self, num_samples=0):
+        self.num_samples = num_samples
+        self.num_chunks = 0
+        self._buffers = {}
+        self._lengths = {}
+        self._layout = None
+    def _extend(self, name, values, capacity=0):
+        values = np.asarray(values)
+        buffer = self._buffers.get(name)
+        length = self._lengths.get(name, 0)
+        needed = length + values.shape[-1]
+        if buffer is None or needed > buffer.shape[-1]:
+            grown = np.empty(values.shape[:-1] + (max(needed, capacity, 2 * length),), dtype=values.dtype)
+            if buffer is not None:
+                grown[..., :length] = buffer[..., :length]
+            self._buffers[name] = buffer = grown
+        buffer[..., length:needed] = values
+        self._lengths[name] = needed
+    def _view(self, name):
+        return self._buffers[name][..., :self._lengths[name]]
+    def append(self, chunk):
+        if self._layout is None:
+            self._layout = {'spikes': len(chunk['spikes']) if 'spikes' in chunk else None, 'recordings': {name: recording['neurons'] for name, recording in chunk.get('recordings', {}).items()}}
+        self._extend('time', chunk['time'], self.num_samples)
+        self._extend('v_soma', chunk['v_soma'], self.num_samples)
+        for i, spikes in enumerate(chunk.get('spikes', [])):
+            self._extend(('spikes', i), spikes)
+        for name, recording in chunk.get('recordings', {}).items():
+            self._extend(('recording_time', name), recording['time'])
+            self._extend(('recording_values', name), recording['values'])
+        self.num_chunks += 1
+    @property
+    def data(self):
+        if self._layout is None:
+            return {}
+        data = {'time': self._view('time'), 'v_soma': self._view('v_soma')}
+        if self._layout['spikes'] is not None:
+            data['spikes'] = [self._view(('spikes', i)) for i in range(self._layout['spikes'])]
+        if self._layout['recordings']:
+            data['recordings'] = {name: {'time': self._view(('recording_time', name)), 'values': self._view(('recording_values', name)), 'neurons': neurons} for name, neurons in self._layout['recordings'].items()}
+        return data
+def merge_chunks(chunks):
+    accumulator = StreamAccumulator(sum(len(chunk['time']) for chunk in chunks))
+    for chunk in chunks:
+        accumulator.append(chunk)
+    return accumulator.data
+_sweep_state = {}
+def init_sweep_worker(num_neurons, model_choice, rm, cm, duration, dt, profiler=None):
+    profiler = profiler or NULL_PROFILER
+    initialize_runtime()
+    with profiler.span('build_network', num_neurons=num_neurons):
+        network = Network(num_neurons, model_choice, rm, cm)
+    _sweep_state['network'] = network
+    _sweep_state['engine'] = SimulationEngine(network.models, duration, dt, record_spikes=True, spike_threshold=-20, profiler=profiler, record_soma=False)
+    _sweep_state['profiler'] = profiler
+def teardown_sweep_worker():
+    if 'engine' in _sweep_state:
+        _sweep_state['engine'].teardown()
+    if 'network' in _sweep_state:
+        _sweep_state['network'].teardown()
+    _sweep_state.clear()
+def trial_streams(seed, key):
+    if seed is None:
+        return None, None
+    return stream_rng(seed, 'connectivity', *key), random123_ids(seed, *key)
+def run_sweep_trial(param_to_sweep, value, connectivity_pattern, connection_prob, in_degree=None, seed=None, key=(0, 0)):
+    network = _sweep_state['network']
+    engine = _sweep_state['engine']
+    profiler = _sweep_state['profiler']
+    rng, random_ids = trial_streams(seed, key)
+    if connectivity_pattern != 'All-to-All' or not network.netcons:
+        with profiler.span('connect', connectivity_pattern=connectivity_pattern):
+            network.connect(connectivity_pattern, connection_prob, in_degree=in_degree, rng=rng)
+    if param_to_sweep == 'stim_amp':
+        network.set_iclamp(0, 100, 100, value)
+    elif param_to_sweep == 'syn_weight':
+        network.set_netstim(0, 'ExpSyn', value, random_ids=random_ids)
+    data = engine.run_simulation()
+    total_spikes = sum(len(spikes) for spikes in data['spikes'])
+    num_neurons = len(network.models)
+    return (total_spikes / num_neurons) / (engine.duration / 1000) if num_neurons > 0 else 0
+def run_design_trial(params, connectivity_pattern, in_degree=None, stimuli=('IClamp',), seed=None, key=(0, 0)):
+    network = _sweep_state['network']
+    engine = _sweep_state['engine']
+    profiler = _sweep_state['profiler']
+    rng, random_ids = trial_streams(seed, key)
+    network.set_passive(params['rm'], params['cm'])
+    if connectivity_pattern != 'All-to-All' or not network.netcons:
+        with profiler.span('connect', connectivity_pattern=connectivity_pattern):
+            network.connect(connectivity_pattern, params['connection_prob'], delay=params['netcon_delay'], in_degree=in_degree, rng=rng)
+    network.set_delay(params['netcon_delay'])
+    onsets = []
+    if 'IClamp' in stimuli:
+        network.set_iclamp(0, params['stim_delay'], params['stim_dur'], params['stim_amp'])
+        onsets.append(params['stim_delay'])
+    if 'NetStim' in stimuli:
+        network.set_netstim(0, 'ExpSyn', params['syn_weight'], params['stim_noise'], random_ids)
+        onsets.append(network.netstim.start)
+    data = engine.run_simulation()
+    return spike_train_metrics(data['spikes'], engine.duration, min(onsets, default=0.0))
+def run_design_batch(tasks, connectivity_pattern, in_degree=None, stimuli=('IClamp',), seed=None):
+    return [run_design_trial(params, connectivity_pattern, in_degree, stimuli, seed, key) for params, key in tasks]
 class BatchSimulationEngine:
-    def run_sweep(self, param_to_sweep, sweep_values, trials_per_set, progress_bar, num_neurons, model_choice, rm, cm, duration, dt, connectivity_pattern, connection_prob):
+    def __init__(self, n_workers=1, cache=None, profiler=None):
+        self.n_workers = max(1, int(n_workers))
+        self.cache = cache
+        self.profiler = profiler or NULL_PROFILER
+    def run_sweep(self, param_to_sweep, sweep_values, trials_per_set, progress_callback, num_neurons, model_choice, rm, cm, duration, dt, connectivity_pattern, connection_prob, in_degree=None, seed=None):
         results = {'param_name': [param_to_sweep] * len(sweep_values), 'param_value': [], 'avg_firing_rate': []}
         total_steps = len(sweep_values) * trials_per_set
         completed_steps = 0
-        for value in sweep_values:
-            all_firing_rates = []
-            for _ in range(trials_per_set):
-                h.finitialize(-65)
-                neuron_models = []
-                for i in range(num_neurons):
-                    model_dict = create_neuron_model(model_choice, rm, cm)
-                    neuron_models.append(model_dict)
-                for i, pre_neuron_dict in enumerate(neuron_models):
-                    for j, post_neuron_dict in enumerate(neuron_models):
-                        if i == j: continue
-                        connect = False
-                        if connectivity_pattern == 'All-to-All':
-                            connect = True
-                        elif connectivity_pattern == 'Random' and random.random() < connection_prob:
-                            connect = True
-                        if connect:
-                            syn = create_synapse(post_neuron_dict['soma'], 'ExpSyn')
-                            if 'axon' in pre_neuron_dict and pre_neuron_dict['axon'] is not None:
-                                apc = h.APCount(pre_neuron_dict['axon'](1))
-                                netcon = h.NetCon(apc, syn)
-                                netcon.weight[0] = 0.02
-                            else:
-                                netcon = h.NetCon(pre_neuron_dict['soma'](1)._ref_v, syn, sec=pre_neuron_dict['soma'])
-                                netcon.weight[0] = 0.02
-                if param_to_sweep == 'stim_amp':
-                    iclamp = create_iclamp(neuron_models[0]['soma'], 100, 100, value)
-                elif param_to_sweep == 'syn_weight':
-                    syn = create_synapse(neuron_models[0]['soma'], 'ExpSyn')
-                    netstim = create_netstim(h)
-                    netcon = h.NetCon(netstim, syn)
-                    netcon.weight[0] = value
-                engine = SimulationEngine(neuron_models, duration, dt)
-                data = engine.run_simulation()
-                total_spikes = 0
-                for i in range(num_neurons):
-                    voltages = data[f'neuron_{i}_v_soma']
-                    times = data['time']
-                    spikes = analyze_spikes(voltages, times, -20)
-                    total_spikes += len(spikes)
-                avg_firing_rate = (total_spikes / num_neurons) / (duration / 1000) if num_neurons > 0 else 0
-                all_firing_rates.append(avg_firing_rate)
-                completed_steps += 1
-                progress_bar.progress(completed_steps / total_steps)
+        network_args = (num_neurons, model_choice, rm, cm, duration, dt)
+        sweep_config = {'num_neurons': num_neurons, 'model_choice': model_choice, 'rm': rm, 'cm': cm, 'duration': duration, 'dt': dt, 'connectivity_pattern': connectivity_pattern, 'connection_prob': connection_prob, 'in_degree': in_degree, 'param_to_sweep': param_to_sweep, 'seed': seed}
+        use_cache = self.cache is not None and is_deterministic(connectivity_pattern, seed, 'NetStim' if param_to_sweep == 'syn_weight' else 'IClamp')
+        all_firing_rates = [[] for _ in sweep_values]
+        pending = []
+        for k, value in enumerate(sweep_values):
+            for trial in range(trials_per_set):
+                cache_key = config_key({**sweep_config, 'value': value, 'trial': trial}) if use_cache else None
+                cached_rate = self.cache.get(cache_key) if use_cache else None
+                if cached_rate is not None:
+                    all_firing_rates[k].append(cached_rate)
+                    completed_steps += 1
+                    if progress_callback is not None:
+                        progress_callback(completed_steps / total_steps)
+                else:
+                    pending.append((k, trial, value, cache_key))
+        def record(k, cache_key, firing_rate):
+            nonlocal completed_steps
+            all_firing_rates[k].append(firing_rate)
+            if cache_key is not None:
+                self.cache.put(cache_key, firing_rate)
+            completed_steps += 1
+            if progress_callback is not None:
+                progress_callback(completed_steps / total_steps)
+        if pending and self.n_workers > 1:
+            mp_context = multiprocessing.get_context('spawn')
+            with self.profiler.span('worker_pool', n_workers=self.n_workers, trials=len(pending)), ProcessPoolExecutor(max_workers=self.n_workers, mp_context=mp_context, initializer=init_sweep_worker, initargs=network_args) as executor:
+                futures = {}
+                for k, trial, value, cache_key in pending:
+                    futures[executor.submit(run_sweep_trial, param_to_sweep, value, connectivity_pattern, connection_prob, in_degree, seed, (value_key(value), trial))] = (k, cache_key)
+                for future in as_completed(futures):
+                    record(*futures[future], future.result())
+        elif pending:
+            init_sweep_worker(*network_args, profiler=self.profiler)
+            self.profiler.snapshot_counts('sweep_network')
+            try:
+                for k, trial, value, cache_key in pending:
+                    with self.profiler.span('trial', value=float(value)):
+                        firing_rate = run_sweep_trial(param_to_sweep, value, connectivity_pattern, connection_prob, in_degree, seed, (value_key(value), trial))
+                    record(k, cache_key, firing_rate)
+            finally:
+                teardown_sweep_worker()
+        for value, firing_rates in zip(sweep_values, all_firing_rates):
             results['param_value'].append(value)
-            results['avg_firing_rate'].append(sum(all_firing_rates) / trials_per_set)
+            results['avg_firing_rate'].append(sum(firing_rates) / trials_per_set)
+        return results
+    def run_design(self, design, trials_per_set, progress_callback, num_neurons, model_choice, duration, dt, connectivity_pattern, base_params, in_degree=None, stimuli=('IClamp',), seed=None):
+        tasks = [(k, trial, {**base_params, **sample}) for k, sample in enumerate(design) for trial in range(trials_per_set)]
+        total_steps = len(tasks)
+        completed_steps = 0
+        network_args = (num_neurons, model_choice, base_params['rm'], base_params['cm'], duration, dt)
+        design_config = {'num_neurons': num_neurons, 'model_choice': model_choice, 'duration': duration, 'dt': dt, 'connectivity_pattern': connectivity_pattern, 'in_degree': in_degree, 'stimuli': list(stimuli), 'seed': seed}
+        metrics = [None] * total_steps
+        pending = []
+        for index, (k, trial, params) in enumerate(tasks):
+            use_cache = self.cache is not None and is_deterministic(connectivity_pattern, seed, 'NetStim' if 'NetStim' in stimuli else 'IClamp', params['stim_noise'])
+            cache_key = config_key({**design_config, 'params': params, 'trial': trial}) if use_cache else None
+            cached_metrics = self.cache.get(cache_key) if use_cache else None
+            if cached_metrics is not None:
+                metrics[index] = cached_metrics
+                completed_steps += 1
+                if progress_callback is not None:
+                    progress_callback(completed_steps / total_steps)
+            else:
+                pending.append((index, cache_key))
+        def record(index, cache_key, trial_metrics):
+            nonlocal completed_steps
+            metrics[index] = trial_metrics
+            if cache_key is not None:
+                self.cache.put(cache_key, trial_metrics)
+            completed_steps += 1
+            if progress_callback is not None:
+                progress_callback(completed_steps / total_steps)
+        if pending and self.n_workers > 1:
+            batch_size = max(1, math.ceil(len(pending) / (self.n_workers * 4)))
+            batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+            mp_context = multiprocessing.get_context('spawn')
+            with self.profiler.span('worker_pool', n_workers=self.n_workers, trials=len(pending), batches=len(batches)), ProcessPoolExecutor(max_workers=self.n_workers, mp_context=mp_context, initializer=init_sweep_worker, initargs=network_args) as executor:
+                futures = {}
+                for batch in batches:
+                    futures[executor.submit(run_design_batch, [(tasks[index][2], (value_key(tasks[index][2]), tasks[index][1])) for index, _ in batch], connectivity_pattern, in_degree, stimuli, seed)] = batch
+                for future in as_completed(futures):
+                    for (index, cache_key), trial_metrics in zip(futures[future], future.result()):
+                        record(index, cache_key, trial_metrics)
+        elif pending:
+            init_sweep_worker(*network_args, profiler=self.profiler)
+            try:
+                for index, cache_key in pending:
+                    with self.profiler.span('trial', sample=tasks[index][0]):
+                        trial_metrics = run_design_trial(tasks[index][2], connectivity_pattern, in_degree, stimuli, seed, (value_key(tasks[index][2]), tasks[index][1]))
+                    record(index, cache_key, trial_metrics)
+            finally:
+                teardown_sweep_worker()
+        results = {'sample': [k for k, _, _ in tasks], 'trial': [trial for _, trial, _ in tasks]}
+        for name in base_params:
+            results[name] = [params[name] for _, _, params in tasks]
+        for name in (metrics[0] if metrics else {}):
+            results[name] = [trial_metrics[name] for trial_metrics in metrics]
         return results
-